@@ -0,0 +1,99 @@
+"""Analysis archive: bulk-ingest rate and list/search latency versus size.
+
+Pushes synthetic analyses (words drawn from a Zipf-distributed vocabulary)
+through AnalysisArchive.submit and the background writer in a temporary
+database up to each size, then times full-text searches for common, mid and
+rare words and two-word queries, the first page of /analyses and
+fetching one analysis.
+
+    python -m benchmarks.bench_archive --sizes 10000 100000 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import shutil
+import string
+import tempfile
+import time
+
+from benchmarks.common import percentile
+
+FIELD_WORDS = {"research": 60, "positives": 30, "flaws": 30, "final_response": 40, "conversational_response": 25}
+
+def make_vocabulary(size, rng):
+    letters = string.ascii_lowercase
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+def make_record(vocabulary, cum_weights, rng):
+    def text(words):
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=words))
+    record = {field: text(words) for field, words in FIELD_WORDS.items()}
+    record["user_input"] = text(rng.randint(5, 12))
+    return record
+
+def time_queries(archive, queries, repeat):
+    latencies, hits = [], 0
+    for query in queries:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            page = archive.search(query, limit=20)
+            latencies.append(time.perf_counter() - start)
+        hits += len(page["results"])
+    return latencies, hits / len(queries)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=20, help="Queries per kind")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    args = parser.parse_args()
+
+    from src.archive import AnalysisArchive
+
+    rng = random.Random(11)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    kinds = {
+        "common word": lambda: vocabulary[rng.randint(0, 20)],
+        "mid word": lambda: vocabulary[rng.randint(500, 2000)],
+        "rare word": lambda: vocabulary[rng.randint(20000, len(vocabulary) - 1)],
+        "two words": lambda: f"{vocabulary[rng.randint(50, 500)]} {vocabulary[rng.randint(50, 500)]}",
+    }
+
+    path = tempfile.mkdtemp(prefix="bench_archive_")
+    try:
+        archive = AnalysisArchive(path=os.path.join(path, "archive.db"), queue_size=10000)
+        written = 0
+        for size in sorted(args.sizes):
+            start, before = time.perf_counter(), written
+            while written < size:
+                for _ in range(min(10000, size - written)):
+                    archive.submit(make_record(vocabulary, cum_weights, rng), session_id=f"s{written % 1000}")
+                    written += 1
+                archive.flush()
+            ingest = time.perf_counter() - start
+            print(f"{size:>9} analyses  ingest {ingest:.0f} s "
+                  f"({(written - before) / max(ingest, 1e-9):.0f}/s incl. text generation)  "
+                  f"db {os.path.getsize(archive.path) / 2**20:.0f} MB")
+
+            for kind, make_query in kinds.items():
+                latencies, hits = time_queries(archive, [make_query() for _ in range(args.queries)], args.repeat)
+                print(f"{'':>11}search {kind:<12} p50 {percentile(latencies, 50) * 1e3:7.2f} ms  "
+                      f"p99 {percentile(latencies, 99) * 1e3:7.2f} ms  {hits:4.1f} results/page")
+
+            latencies = []
+            for _ in range(args.queries * args.repeat):
+                start = time.perf_counter()
+                archive.list(limit=20)
+                archive.get(rng.randint(1, written))
+                latencies.append(time.perf_counter() - start)
+            print(f"{'':>11}list + get          p50 {percentile(latencies, 50) * 1e3:7.2f} ms  "
+                  f"p99 {percentile(latencies, 99) * 1e3:7.2f} ms")
+        archive.close()
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Load benchmark: blocking vs native asyncio analysis pipeline.
+
+Runs N concurrent analyses inside one event loop, the way a single uvicorn
+worker serves /analyze. The sync path calls process_user_input directly from
+the loop (what the API handlers used to do); the async path awaits
+process_user_input_async.
+
+    python -m benchmarks.bench_async --requests 200 --concurrency 100
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+from benchmarks.common import start_stub, report
+
+IDEA = "A subscription service delivering coffee by drone"
+
+async def run_sync(system_cls, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                system_cls().process_user_input(IDEA)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - start
+
+async def run_async(system_cls, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await system_cls().process_user_input_async(IDEA)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--sync-requests", type=int, default=20,
+                        help="The sync path is serial, so run fewer requests")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    # Every run sends the same idea; measure the pipeline, not cache hits,
+    # and don't leave cache or archive databases in the working directory.
+    os.environ.update(CACHE_ENABLED="0", SEMANTIC_CACHE_ENABLED="0", ARCHIVE_ENABLED="0")
+    stub, base_url = start_stub(latency_ms=args.latency_ms)
+    try:
+        from src.orchestrator import MultiAgentSystem
+
+        print(f"Stub LLM at {base_url}, {args.latency_ms:.0f} ms per call, 6 calls per analysis")
+        latencies, elapsed = asyncio.run(run_sync(MultiAgentSystem, args.sync_requests, args.concurrency))
+        report("sync", latencies, elapsed)
+        latencies, elapsed = asyncio.run(run_async(MultiAgentSystem, args.requests, args.concurrency))
+        report("async", latencies, elapsed)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    main()
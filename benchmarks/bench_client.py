@@ -0,0 +1,56 @@
+"""Micro-benchmark: a new Cerebras client per call vs the shared pooled client.
+
+Calls the stub LLM server sequentially and reports per-call overhead and how
+many TCP connections the server saw for each strategy.
+
+    python -m benchmarks.bench_client --calls 200
+"""
+import argparse
+import time
+
+import httpx
+
+from benchmarks.common import start_stub, percentile
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+def stub_stats(base_url):
+    return httpx.get(f"{base_url}/stats").json()
+
+def measure(label, base_url, make_client, calls):
+    before = stub_stats(base_url)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = make_client()
+        client.chat.completions.create(messages=MESSAGES, model="stub")
+        latencies.append(time.perf_counter() - start)
+    after = stub_stats(base_url)
+    connections = after["connections"] - before["connections"]
+    print(f"{label:<10} mean {sum(latencies) / len(latencies) * 1000:>7.2f} ms  "
+          f"p50 {percentile(latencies, 50) * 1000:>7.2f} ms  "
+          f"p99 {percentile(latencies, 99) * 1000:>7.2f} ms  "
+          f"connections {connections}")
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    stub, base_url = start_stub(latency_ms=0)
+    try:
+        from cerebras.cloud.sdk import Cerebras
+        from src.config import get_api_key, get_client
+
+        # What get_client() used to do on every agent call.
+        fresh = measure("per-call", base_url, lambda: Cerebras(api_key=get_api_key()), args.calls)
+        pooled = measure("pooled", base_url, get_client, args.calls)
+        saved = (sum(fresh) - sum(pooled)) / args.calls * 1000
+        print(f"Overhead saved per call: {saved:.2f} ms")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Prompt size and per-turn latency over a long conversational session.
+
+Drives 200 turns (alternating analysis delivery and chat) through the
+conversational agent against the stub LLM, whose prefill time grows with
+prompt size, with and without the context token budget.
+
+    python -m benchmarks.bench_context --turns 200
+"""
+import argparse
+import time
+
+from benchmarks.common import start_stub
+
+# Roughly the size of a real composer synthesis.
+FINAL_RESPONSE = ("**Context:** Similar ventures have raised funding but struggled with unit economics. "
+                  "- Strength: clear demand. - Risk: regulation and costs. ") * 8
+
+def run_session(turns, budget, report_every):
+    import src.context
+    from src.agents.conversational import run_conversational_agent, run_chat_mode, SYSTEM_PROMPT
+    from src.context import history_tokens
+
+    src.context.CONTEXT_TOKEN_BUDGET = budget
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    label = f"budget {budget}" if budget else "unbounded"
+    for turn in range(1, turns + 1):
+        start = time.perf_counter()
+        if turn % 2:
+            run_conversational_agent(f"Idea number {turn}: drones that deliver coffee", FINAL_RESPONSE, history)
+        else:
+            run_chat_mode(f"Tell me more about point {turn}", history)
+        elapsed = time.perf_counter() - start
+        if turn == 1 or turn % report_every == 0:
+            print(f"{label:<12} turn {turn:>4}  prompt {history_tokens(history):>7} tokens  "
+                  f"{len(history):>4} msgs  latency {elapsed * 1000:>7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--report-every", type=int, default=50)
+    args = parser.parse_args()
+
+    stub, _ = start_stub(latency_ms=20, extra_args=("--prefill-ms-per-ktok", "10", "--reply-words", "60"))
+    try:
+        run_session(args.turns, 0, args.report_every)
+        run_session(args.turns, args.budget, args.report_every)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    main()
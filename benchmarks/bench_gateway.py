@@ -0,0 +1,78 @@
+"""Throughput against a rate-limited, flaky provider, with and without the gateway.
+
+The stub LLM enforces a requests-per-minute limit (429 + Retry-After) and
+fails a fraction of calls with 503. A batch of ideas is pushed through the
+pipeline with the gateway off (SDK defaults) and on (GATEWAY_RPM set to the
+provider limit). Each mode runs in its own process since the settings are
+read at import time.
+
+    python -m benchmarks.bench_gateway --ideas 60 --rpm-limit 600 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import start_stub
+
+def run_mode(ideas, concurrency):
+    """Child process: run the batch with the current environment, print a JSON summary."""
+    from src.batch import run_ideas
+
+    records = []
+    items = [{"id": str(i), "idea": f"Idea {i}: drones that deliver coffee"} for i in range(ideas)]
+    start = time.perf_counter()
+    asyncio.run(run_ideas(items, records.append, concurrency=concurrency))
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for record in records if "error" in record)
+    print(json.dumps({"ok": len(records) - failed, "failed": failed, "seconds": elapsed}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ideas", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rpm-limit", type=float, default=600)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.ideas, args.concurrency)
+        return
+
+    stub, base_url = start_stub(latency_ms=50, extra_args=(
+        "--rpm-limit", str(args.rpm_limit), "--error-rate", str(args.error_rate)))
+    try:
+        print(f"Provider limit {args.rpm_limit:.0f} RPM, {args.error_rate:.0%} injected 503s, "
+              f"{args.ideas} ideas x 4 calls")
+        modes = [
+            ("no gateway", {"GATEWAY_ENABLED": "0"}),
+            ("gateway", {"GATEWAY_ENABLED": "1", "GATEWAY_RPM": str(args.rpm_limit)}),
+        ]
+        for label, env in modes:
+            before = httpx.get(f"{base_url}/stats").json()["statuses"]
+            child_env = dict(os.environ, CACHE_ENABLED="0", **env)
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_gateway", "--child",
+                 "--ideas", str(args.ideas), "--concurrency", str(args.concurrency)],
+                env=child_env, capture_output=True, text=True, check=True,
+            ).stdout
+            summary = json.loads(output.strip().splitlines()[-1])
+            after = httpx.get(f"{base_url}/stats").json()["statuses"]
+            statuses = {k: after.get(k, 0) - before.get(k, 0) for k in after}
+            useful = statuses.get("200", 0) / summary["seconds"] * 60
+            print(f"{label:<11} ideas ok {summary['ok']:>4}  failed {summary['failed']:>4}  "
+                  f"{summary['seconds']:>6.1f} s  provider 200/429/503 "
+                  f"{statuses.get('200', 0)}/{statuses.get('429', 0)}/{statuses.get('503', 0)}  "
+                  f"useful {useful:>5.0f} RPM")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    main()
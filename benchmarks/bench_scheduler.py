@@ -0,0 +1,62 @@
+"""End-to-end analysis latency under different stage schedules.
+
+Uses the stub LLM with deterministic latency (fixed time to first token plus a
+fixed per-token delay) and compares the strictly staged pipeline with
+speculative research, critics starting on a research prefix, and a merged
+composer + delivery call.
+
+    python -m benchmarks.bench_scheduler --runs 10
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import start_stub, percentile
+
+IDEA = "Flying cars for daily commuters"
+
+SCHEDULES = [
+    ("staged", dict(SPECULATIVE_RESEARCH=False, CRITIC_PREFIX_CHARS=0, MERGE_DELIVERY=False)),
+    ("speculative", dict(SPECULATIVE_RESEARCH=True, CRITIC_PREFIX_CHARS=0, MERGE_DELIVERY=False)),
+    ("+prefix", dict(SPECULATIVE_RESEARCH=True, CRITIC_PREFIX_CHARS=200, MERGE_DELIVERY=False)),
+    ("+merged", dict(SPECULATIVE_RESEARCH=True, CRITIC_PREFIX_CHARS=200, MERGE_DELIVERY=True)),
+]
+
+async def run_schedule(runs):
+    from src.cache import bypass_cache
+    from src.orchestrator import MultiAgentSystem
+
+    latencies = []
+    with bypass_cache():
+        for _ in range(runs):
+            start = time.perf_counter()
+            await MultiAgentSystem().process_user_input_async(IDEA)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--token-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    stub, _ = start_stub(latency_ms=args.latency_ms, extra_args=("--token-ms", str(args.token_ms)))
+    try:
+        import src.config
+
+        call_ms = args.latency_ms + args.token_ms * 119
+        print(f"Each analysis call: {call_ms:.0f} ms, router: {args.latency_ms:.0f} ms; "
+              f"sum of stages {args.latency_ms + 4 * call_ms:.0f} ms")
+        for label, settings in SCHEDULES:
+            for name, value in settings.items():
+                setattr(src.config, name, value)
+            latencies = asyncio.run(run_schedule(args.runs))
+            print(f"{label:<12} p50 {percentile(latencies, 50) * 1000:>8.1f} ms  "
+                  f"p99 {percentile(latencies, 99) * 1000:>8.1f} ms")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Semantic cache lookup latency versus index size.
+
+Fills a SemanticIndex in a temporary directory with synthetic ideas (words
+drawn from a Zipf-distributed vocabulary) up to each size, then times lookups
+of reworded stored ideas (expected hits) and unseen ideas (expected misses),
+next to a brute-force scan of the whole matrix for comparison.
+
+    python -m benchmarks.bench_semantic --sizes 10000 100000 1000000
+"""
+import argparse
+import itertools
+import random
+import shutil
+import string
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import percentile
+
+PAYLOAD = {"research": "r", "positives": "p", "flaws": "f", "final_response": "x"}
+
+def make_vocabulary(size, rng):
+    letters = string.ascii_lowercase
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+def make_idea(vocabulary, cum_weights, rng):
+    return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(4, 7)))
+
+def reword(idea, rng):
+    """Shuffle the words and add filler, like a user rephrasing the same idea."""
+    words = idea.split()
+    rng.shuffle(words)
+    return "an app for " + " ".join(words)
+
+def time_lookups(index, queries):
+    from src.semantic_cache import embed
+
+    latencies, hits = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        result = index.lookup(query)
+        latencies.append(time.perf_counter() - start)
+        hits += result is not None
+    # Brute force: score every stored row.
+    brute = []
+    for query in queries[:50]:
+        start = time.perf_counter()
+        vector, _ = embed(query, index.dim)
+        scores = index.vectors[:index.size].astype(np.float32) @ vector
+        int(np.argmax(scores))
+        brute.append(time.perf_counter() - start)
+    return latencies, hits, brute
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    args = parser.parse_args()
+
+    from src.semantic_cache import SemanticIndex
+
+    rng = random.Random(7)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    path = tempfile.mkdtemp(prefix="bench_semantic_")
+    try:
+        index = SemanticIndex(path=path, capacity=max(args.sizes), ttl=3600)
+        stored = []
+        for size in sorted(args.sizes):
+            start = time.perf_counter()
+            while index.size < size:
+                batch = [make_idea(vocabulary, cum_weights, rng) for _ in range(min(10000, size - index.size))]
+                # Synthetic ideas are effectively unique, so skip the duplicate check
+                index.bulk_add([(idea, PAYLOAD) for idea in batch])
+                stored.extend(batch)
+            fill = time.perf_counter() - start
+
+            half = args.queries // 2
+            queries = [reword(rng.choice(stored), rng) for _ in range(half)]
+            queries += [make_idea(vocabulary, cum_weights, rng) + " extra" for _ in range(args.queries - half)]
+            latencies, hits, brute = time_lookups(index, queries)
+            print(f"{size:>9} ideas  lookup p50 {percentile(latencies, 50) * 1e3:.3f} ms  "
+                  f"p99 {percentile(latencies, 99) * 1e3:.3f} ms  hits {hits}/{len(queries)} "
+                  f"(expected ~{half})  brute-force p50 {percentile(brute, 50) * 1e3:.1f} ms  "
+                  f"(filled in {fill:.0f} s)")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Web UI serving and cold start: the launcher vs the two-server setup.
+
+* two-server: frontend/server.py (a single-threaded TCPServer with
+  SimpleHTTPRequestHandler) on port 8000 for the page, plus
+  `uvicorn src.api:app` for the API.
+* serve: `python main.py serve --workers N`, one port for both.
+
+Reports, for each setup:
+
+* cold start: time from launch until both the page and the API answer, the
+  first /classify after that (which loads the agents and the LLM client),
+  and the resident memory of all server processes when idle;
+* page loads: simulated browsers loading index.html, style.css and
+  script.js on a first visit, then revisiting with the validators they got
+  (If-None-Match / If-Modified-Since); the launcher's versioned assets are
+  cached outright, so a revisit only revalidates index.html. Throughput,
+  p50/p99 per page load and bytes on the wire per load.
+
+The API runs on the replay backend, so no API key is needed.
+
+    python -m benchmarks.bench_static --browsers 50 --visits 10 --workers 2
+"""
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import free_port, percentile
+from benchmarks.suite import proc_memory_mb
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEGACY_PORT = 8000  # fixed in frontend/server.py
+ASSET_RE = re.compile(r'(?:href|src)="((?:style\.css|script\.js)[^"]*)"')
+
+def tree_rss_mb(pid):
+    """Resident memory of a process and all its descendants."""
+    total, pending = 0.0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            total += proc_memory_mb(current)[0]
+            with open(f"/proc/{current}/task/{current}/children") as handle:
+                pending.extend(int(child) for child in handle.read().split())
+        except FileNotFoundError:
+            pass
+    return total
+
+def wait_until(check, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if check():
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError("server did not come up")
+
+def start(setup, workers, workdir, env):
+    """Launch a setup; returns (processes, page URL, API URL, seconds until both answer)."""
+    started = time.perf_counter()
+    if setup == "two-server":
+        api_port = free_port()
+        processes = [
+            subprocess.Popen([sys.executable, "server.py"], cwd=os.path.join(ROOT, "frontend"),
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+            subprocess.Popen([sys.executable, "-m", "uvicorn", "src.api:app", "--port", str(api_port),
+                              "--log-level", "warning"], cwd=workdir, env=env),
+        ]
+        page_url, api_url = f"http://127.0.0.1:{LEGACY_PORT}", f"http://127.0.0.1:{api_port}"
+    else:
+        port = free_port()
+        processes = [subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "main.py"), "serve", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning"],
+            cwd=workdir, env=env, stderr=subprocess.DEVNULL,
+        )]
+        page_url = api_url = f"http://127.0.0.1:{port}"
+    wait_until(lambda: httpx.get(f"{page_url}/index.html").status_code == 200
+               and httpx.post(f"{api_url}/session").status_code == 200)
+    return processes, page_url, api_url, time.perf_counter() - started
+
+def stop(processes):
+    for process in processes:
+        process.send_signal(signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+async def browse(page_url, visits, cached_assets):
+    """One browser: a first visit, then revisits with conditional requests."""
+    latencies, wire = [], []
+    validators = {}
+    # Browsers open up to six connections per host
+    limits = httpx.Limits(max_connections=6)
+    async with httpx.AsyncClient(base_url=page_url, limits=limits, timeout=60,
+                                 headers={"Accept-Encoding": "br, gzip"}) as client:
+
+        async def fetch(path):
+            headers = {}
+            if path in validators:
+                etag, modified = validators[path]
+                if etag:
+                    headers["If-None-Match"] = etag
+                if modified:
+                    headers["If-Modified-Since"] = modified
+            response = await client.get("/" + path, headers=headers)
+            if response.status_code == 200:
+                validators[path] = (response.headers.get("etag"), response.headers.get("last-modified"))
+            return response
+
+        assets = []
+        for visit in range(visits):
+            start = time.perf_counter()
+            page = await fetch("")
+            if page.status_code == 200:
+                assets = ASSET_RE.findall(page.text)
+            # Versioned, immutable assets are served from the browser cache after the first visit
+            wanted = assets if visit == 0 or not cached_assets else []
+            responses = [page, *await asyncio.gather(*(fetch(asset) for asset in wanted))]
+            latencies.append(time.perf_counter() - start)
+            wire.append(sum(response.num_bytes_downloaded for response in responses))
+    return latencies, wire
+
+async def load_pages(page_url, browsers, visits, cached_assets):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(browse(page_url, visits, cached_assets) for _ in range(browsers)))
+    elapsed = time.perf_counter() - start
+    first = [latencies[0] for latencies, _ in results]
+    repeat = [latency for latencies, _ in results for latency in latencies[1:]]
+    first_bytes = sum(wire[0] for _, wire in results) / len(results)
+    repeat_bytes = sum(sum(wire[1:]) for _, wire in results) / max(1, len(repeat))
+    return first, repeat, (first_bytes, repeat_bytes), elapsed
+
+def port_free(port):
+    with socket.socket() as sock:
+        return sock.connect_ex(("127.0.0.1", port)) != 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--browsers", type=int, default=50, help="Concurrent simulated browsers")
+    parser.add_argument("--visits", type=int, default=10, help="Page loads per browser (first + revisits)")
+    parser.add_argument("--workers", type=int, default=2, help="Workers for main.py serve")
+    parser.add_argument("--cold-starts", type=int, default=3, help="Launches timed per setup")
+    args = parser.parse_args()
+
+    if not port_free(LEGACY_PORT):
+        raise SystemExit(f"Port {LEGACY_PORT} is in use; frontend/server.py needs it")
+
+    workdir = tempfile.mkdtemp(prefix="bench_static_")
+    env = dict(os.environ, PYTHONPATH=ROOT, LLM_BACKEND="replay", LLM_RECORDING="",
+               REPLAY_TTFT_MS="1", REPLAY_TTFT_P99_MS="2", REPLAY_TOKENS_PER_S="0")
+    setups = [("two-server", 1), ("serve", 1), ("serve", args.workers)]
+    try:
+        for setup, workers in setups:
+            label = setup if setup == "two-server" else f"serve x{workers}"
+            ready, first_call, rss = [], [], []
+            for _ in range(args.cold_starts):
+                processes, page_url, api_url, seconds = start(setup, workers, workdir, env)
+                try:
+                    ready.append(seconds)
+                    call = time.perf_counter()
+                    httpx.post(f"{api_url}/classify", json={"idea": "Hello there"}, timeout=60).raise_for_status()
+                    first_call.append(time.perf_counter() - call)
+                    time.sleep(0.5)
+                    rss.append(sum(tree_rss_mb(process.pid) for process in processes))
+                finally:
+                    stop(processes)
+            print(f"{label:<12} cold start {percentile(ready, 50):.2f} s  first /classify "
+                  f"{percentile(first_call, 50) * 1000:.0f} ms  idle RSS {percentile(rss, 50):.0f} MB")
+
+            processes, page_url, _, _ = start(setup, workers, workdir, env)
+            try:
+                first, repeat, wire, elapsed = asyncio.run(
+                    load_pages(page_url, args.browsers, args.visits, cached_assets=setup == "serve"))
+            finally:
+                stop(processes)
+            loads = len(first) + len(repeat)
+            print(f"{'':<12} {loads} page loads  {loads / elapsed:7.1f} loads/s  "
+                  f"first visit p50 {percentile(first, 50) * 1000:6.1f} ms p99 {percentile(first, 99) * 1000:6.1f} ms  "
+                  f"revisit p50 {percentile(repeat, 50) * 1000:6.1f} ms p99 {percentile(repeat, 99) * 1000:6.1f} ms  "
+                  f"{wire[0] / 1024:5.1f} / {wire[1] / 1024:4.1f} KiB per first / repeat load")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Time-to-first-token: /analyze vs the streaming /analyze/stream endpoint.
+
+Starts the API under uvicorn against the stub LLM server (which emits tokens at
+a fixed rate) and reports when the first agent token reaches the client.
+
+    python -m benchmarks.bench_stream --runs 5
+"""
+import argparse
+import os
+import time
+
+import httpx
+
+from benchmarks.common import start_stub, start_api, percentile
+
+IDEA = "A subscription service delivering coffee by drone"
+
+def time_blocking(base_url):
+    start = time.perf_counter()
+    httpx.post(f"{base_url}/analyze", json={"idea": IDEA}, timeout=120).raise_for_status()
+    elapsed = time.perf_counter() - start
+    # Nothing is visible until the whole pipeline has finished.
+    return elapsed, elapsed
+
+def time_streaming(base_url):
+    start = time.perf_counter()
+    first = None
+    with httpx.stream("POST", f"{base_url}/analyze/stream", json={"idea": IDEA}, timeout=120) as response:
+        for line in response.iter_lines():
+            if first is None and '"type": "token"' in line:
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--token-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    # Every run sends the same idea; measure the pipeline, not cache hits,
+    # and don't leave cache or archive databases in the working directory.
+    os.environ.update(CACHE_ENABLED="0", SEMANTIC_CACHE_ENABLED="0", ARCHIVE_ENABLED="0")
+    stub, _ = start_stub(latency_ms=args.latency_ms, extra_args=("--token-ms", str(args.token_ms)))
+    api, base_url = start_api()
+    try:
+        for label, run in (("/analyze", time_blocking), ("/analyze/stream", time_streaming)):
+            results = [run(base_url) for _ in range(args.runs)]
+            ttft = [first for first, _ in results]
+            total = [elapsed for _, elapsed in results]
+            print(f"{label:<16} TTFT p50 {percentile(ttft, 50) * 1000:>8.1f} ms  "
+                  f"total p50 {percentile(total, 50) * 1000:>8.1f} ms")
+    finally:
+        api.terminate()
+        stub.terminate()
+        api.wait()
+        stub.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_stub(latency_ms=50, extra_args=()):
+    """Start benchmarks.stub_llm in a subprocess and point the app at it."""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(port),
+         "--latency-ms", str(latency_ms), *extra_args],
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_for(f"{base_url}/v1/tcp_warming", proc)
+
+    os.environ["CEREBRAS_BASE_URL"] = base_url
+    os.environ.setdefault("CEREBRAS_API_KEY", "stub-key")
+    return proc, base_url
+
+def wait_for(url, proc, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=0.5)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"Server at {url} did not start")
+
+def start_api(extra_env=None):
+    """Start src.api under uvicorn (inheriting the stub settings) and return its URL."""
+    port = free_port()
+    env = dict(os.environ, **(extra_env or {}))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api:app", "--port", str(port),
+         "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_for(f"{base_url}/docs", proc)
+    return proc, base_url
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(label, latencies, elapsed):
+    rps = len(latencies) / elapsed if elapsed else 0.0
+    print(f"{label:<12} {len(latencies):>6} req  {rps:>8.1f} req/s  "
+          f"p50 {percentile(latencies, 50) * 1000:>8.1f} ms  "
+          f"p99 {percentile(latencies, 99) * 1000:>8.1f} ms")
@@ -0,0 +1,74 @@
+"""Offline evaluation of the intent router across model tiers.
+
+Runs the READY / NOT_READY router prompt over a labeled prompt set with each
+model tier, then reports accuracy against the labels, agreement between the
+tiers and router latency. Each raw reply is scored as READY, NOT_READY or
+UNCLEAR (neither word), and UNCLEAR counts as wrong. The local
+pre-classifier is reported separately.
+Needs CEREBRAS_API_KEY (or CEREBRAS_BASE_URL pointing at a compatible server).
+
+    python -m benchmarks.eval_router --models llama3.1-8b llama-3.3-70b
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks.common import percentile
+
+DEFAULT_DATA = os.path.join(os.path.dirname(__file__), "data", "router_prompts.jsonl")
+
+def load(path):
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+def classify(model, text):
+    from src.agents.conversational import build_router_messages, router_label
+    from src.llm import complete
+
+    start = time.perf_counter()
+    reply = complete(build_router_messages(text), model=model, agent="router")
+    return router_label(reply) or "UNCLEAR", time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA, help="JSONL with input and label (READY / NOT_READY)")
+    parser.add_argument("--models", nargs="+", help="Models to compare (default: FAST_MODEL and DEFAULT_MODEL)")
+    args = parser.parse_args()
+
+    from src.agents.conversational import quick_classify
+    from src.cache import bypass_cache
+    from src.config import FAST_MODEL, DEFAULT_MODEL
+
+    examples = load(args.data)
+    models = args.models or [FAST_MODEL, DEFAULT_MODEL]
+
+    local = [(quick_classify(e["input"]), e["label"]) for e in examples]
+    decided = [(guess, label) for guess, label in local if guess is not None]
+    correct = sum((guess and label == "READY") or (not guess and label == "NOT_READY") for guess, label in decided)
+    print(f"{'pre-classifier':<18} decides {len(decided)}/{len(examples)}, "
+          f"accuracy on those {correct / max(1, len(decided)):.1%}")
+
+    predictions = {}
+    with bypass_cache():
+        for model in models:
+            results = [classify(model, e["input"]) for e in examples]
+            predictions[model] = [label for label, _ in results]
+            latencies = [seconds for _, seconds in results]
+            accuracy = sum(p == e["label"] for p, e in zip(predictions[model], examples)) / len(examples)
+            ready = predictions[model].count("READY")
+            unclear = predictions[model].count("UNCLEAR")
+            print(f"{model:<18} accuracy {accuracy:.1%}  READY {ready}/{len(examples)}  unclear {unclear}  "
+                  f"latency p50 {percentile(latencies, 50) * 1000:.0f} ms  "
+                  f"p99 {percentile(latencies, 99) * 1000:.0f} ms")
+
+    for i, first in enumerate(models):
+        for second in models[i + 1:]:
+            agree = sum(a == b for a, b in zip(predictions[first], predictions[second])) / len(examples)
+            print(f"agreement {first} vs {second}: {agree:.1%}")
+            for example, a, b in zip(examples, predictions[first], predictions[second]):
+                if a != b:
+                    print(f"  disagree: {example['input']!r} ({first}: {a}, {second}: {b}, label {example['label']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Near-duplicate decisions of the semantic cache on labelled idea pairs.
+
+Stores each pair's first idea in an in-memory SemanticIndex, looks up the
+second and checks whether the cache reused the analysis exactly when the two
+describe the same idea. Exits 1 on any wrong decision, so it can run as a
+regression check.
+
+    python -m benchmarks.eval_semantic
+"""
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_DATA = os.path.join(os.path.dirname(__file__), "data", "semantic_pairs.jsonl")
+
+def load(path):
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA, help="JSONL with stored, query and same (true / false)")
+    args = parser.parse_args()
+
+    from src.semantic_cache import SemanticIndex
+
+    pairs = load(args.data)
+    wrong = 0
+    for pair in pairs:
+        index = SemanticIndex(path=None, capacity=16, ttl=3600)
+        index.add(pair["stored"], {"final_response": "x"})
+        _, score = index.search(pair["query"])
+        hit = index.lookup(pair["query"]) is not None
+        ok = hit == pair["same"]
+        wrong += not ok
+        print(f"{'ok   ' if ok else 'WRONG'} similarity {score:.3f}  {'hit ' if hit else 'miss'}  "
+              f"{pair['query'][:70]!r}")
+    print(f"{len(pairs) - wrong}/{len(pairs)} pairs decided correctly")
+    if wrong:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
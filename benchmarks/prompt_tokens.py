@@ -0,0 +1,113 @@
+"""Per-stage prompt-token accounting for one analysis.
+
+Builds the exact messages each agent would send for a few consecutive
+analyses in one session (agent outputs are fixed texts of the length each
+prompt asks for), and reports prompt tokens per stage plus how many of them
+are a prefix shared with an earlier call in the same analysis, i.e. what a
+prefix cache can reuse. No model calls are made.
+
+    python -m benchmarks.prompt_tokens --save before.json
+    python -m benchmarks.prompt_tokens --compare before.json
+"""
+import argparse
+import json
+
+STAGES = ("research", "optimist", "devil", "composer", "conversational")
+
+# Stand-ins for agent outputs, sized to each prompt's word limit.
+SENTENCE = "Similar ventures raised funding but struggled with unit economics, regulation and customer trust. "
+OUTPUT_WORDS = {"research": 150, "optimist": 150, "devil": 150, "composer": 200, "conversational": 150}
+
+def fake_output(stage):
+    words = (SENTENCE * 40).split()
+    return "- " + " ".join(words[:OUTPUT_WORDS[stage]])
+
+def serialize(messages):
+    return "".join(f"<{m['role']}>\n{m['content']}\n" for m in messages)
+
+def shared_prefix(text, earlier):
+    """Length in characters of the longest prefix text shares with an earlier prompt."""
+    best = 0
+    for other in earlier:
+        n = 0
+        for a, b in zip(text, other):
+            if a != b:
+                break
+            n += 1
+        best = max(best, n)
+    return best
+
+def account(idea, history):
+    """Prompt tokens and shared-prefix tokens per stage for one analysis."""
+    from src.agents import composer, devil, optimist, research
+    from src.agents.conversational import build_conversational_messages
+    from src.context import count_tokens, history_tokens
+
+    outputs = {stage: fake_output(stage) for stage in STAGES}
+    prompts = {
+        "research": research.build_messages(idea),
+        "optimist": optimist.build_messages(idea, outputs["research"]),
+        "devil": devil.build_messages(idea, outputs["research"]),
+        "composer": composer.build_messages(idea, outputs["research"], outputs["optimist"], outputs["devil"]),
+        "conversational": list(build_conversational_messages(idea, outputs["composer"], history)),
+    }
+    history.append({"role": "assistant", "content": outputs["conversational"]})
+
+    rows = {}
+    earlier = []
+    for stage in STAGES:
+        text = serialize(prompts[stage])
+        rows[stage] = {
+            "prompt": history_tokens(prompts[stage]),
+            "shared_prefix": count_tokens(text[:shared_prefix(text, earlier)]),
+        }
+        earlier.append(text)
+    return rows
+
+def run(analyses):
+    from src.agents.conversational import SYSTEM_PROMPT
+
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    totals = {stage: {"prompt": 0, "shared_prefix": 0} for stage in STAGES}
+    for i in range(analyses):
+        rows = account(f"Idea {i + 1}: a drone service that delivers hot coffee to office workers", history)
+        for stage, row in rows.items():
+            for key, value in row.items():
+                totals[stage][key] += value
+    return {stage: {key: round(value / analyses) for key, value in row.items()} for stage, row in totals.items()}
+
+def print_report(report, baseline=None):
+    header = f"{'stage':<16}{'prompt':>8}{'prefix':>8}{'uncached':>10}"
+    if baseline:
+        header += f"{'before':>8}{'change':>9}"
+    print(header)
+    for stage in STAGES + ("total",):
+        row = report[stage]
+        line = f"{stage:<16}{row['prompt']:>8}{row['shared_prefix']:>8}{row['prompt'] - row['shared_prefix']:>10}"
+        if baseline:
+            before = baseline[stage]["prompt"]
+            line += f"{before:>8}{(row['prompt'] - before) / max(1, before):>+9.0%}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=3, help="Consecutive analyses in one session to average over")
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="JSON report from an earlier run to compare against")
+    args = parser.parse_args()
+
+    report = run(args.analyses)
+    report["total"] = {key: sum(report[stage][key] for stage in STAGES) for key in ("prompt", "shared_prefix")}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    print_report(report, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Soak test for the session store: RSS while sessions churn.
+
+Simulates many users each running a few analyses (4 history messages of
+typical size per analysis) through the session store, with no LLM calls, and
+prints resident memory as sessions are created. With LRU eviction RSS should
+level off once the store reaches SESSION_MAX.
+
+    python -m benchmarks.soak_sessions --sessions 100000 --max-sessions 20000
+"""
+import argparse
+import asyncio
+import time
+
+from src.sessions import MemorySessionStore, SQLiteSessionStore
+
+MESSAGE = "x" * 400
+
+def rss_mb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+async def soak(store, sessions, turns, report_every):
+    start = time.perf_counter()
+    for i in range(1, sessions + 1):
+        async with store.session() as (session_id, system):
+            pass
+        for _ in range(turns):
+            async with store.session(session_id) as (_, system):
+                for role in ("user", "assistant", "user", "assistant"):
+                    system.conversational_history.append({"role": role, "content": MESSAGE})
+        if i % report_every == 0:
+            print(f"{i:>8} sessions  stored {len(store):>7}  RSS {rss_mb():>8.1f} MB  "
+                  f"{time.perf_counter() - start:>6.1f} s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--max-sessions", type=int, default=20000)
+    parser.add_argument("--store", choices=("memory", "sqlite"), default="memory")
+    parser.add_argument("--db", default="soak_sessions.db")
+    parser.add_argument("--report-every", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.store == "memory":
+        store = MemorySessionStore(max_sessions=args.max_sessions)
+    else:
+        store = SQLiteSessionStore(path=args.db)
+    print(f"Baseline RSS {rss_mb():.1f} MB")
+    asyncio.run(soak(store, args.sessions, args.turns, args.report_every))
+
+if __name__ == "__main__":
+    main()
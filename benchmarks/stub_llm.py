@@ -0,0 +1,181 @@
+"""Local stand-in for the Cerebras chat completions endpoint.
+
+Serves OpenAI-style `/v1/chat/completions` responses (plain or streamed) after a
+fixed delay so the agents can be exercised without network access or an API key:
+
+    python -m benchmarks.stub_llm --port 9100 --latency-ms 50
+
+Point the app at it with CEREBRAS_BASE_URL=http://127.0.0.1:9100.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+REPLY_WORDS = ("This idea has clear strengths and real risks worth weighing carefully. " * 12).split()
+
+def make_app(latency_ms=50, reply_words=120, token_ms=0, prefill_ms_per_ktok=0,
+             error_rate=0.0, hang_rate=0.0, rpm_limit=0, unavailable_models=()):
+    app = FastAPI(title="Stub LLM")
+    app.state.requests = 0
+    app.state.peers = set()
+    app.state.statuses = {}
+    # Provider-style rate limit: a token bucket holding one second of requests.
+    limit = {"tokens": rpm_limit / 60, "updated": time.monotonic()}
+
+    def count(status):
+        app.state.statuses[status] = app.state.statuses.get(status, 0) + 1
+
+    def over_limit():
+        if not rpm_limit:
+            return False
+        now = time.monotonic()
+        limit["tokens"] = min(rpm_limit / 60, limit["tokens"] + (now - limit["updated"]) * rpm_limit / 60)
+        limit["updated"] = now
+        if limit["tokens"] < 1:
+            return True
+        limit["tokens"] -= 1
+        return False
+
+    @app.get("/v1/tcp_warming")
+    async def tcp_warming(request: Request):
+        if request.client:
+            app.state.peers.add((request.client.host, request.client.port))
+        return "ok"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        if request.client:
+            app.state.peers.add((request.client.host, request.client.port))
+
+        # Injected faults: missing models, rate limiting, transient 5xx and hung requests.
+        if body.get("model") in unavailable_models:
+            count(404)
+            return JSONResponse({"message": "model not found"}, status_code=404)
+        if over_limit():
+            count(429)
+            return JSONResponse({"message": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+        if random.random() < error_rate:
+            count(503)
+            return JSONResponse({"message": "injected failure"}, status_code=503)
+        if random.random() < hang_rate:
+            count("hang")
+            await asyncio.sleep(3600)
+        count(200)
+
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        prompt_tokens = len(prompt.split())
+
+        # Time to first token is latency_ms plus prefill proportional to prompt
+        # size; token_ms is the gap between generated tokens.
+        await asyncio.sleep((latency_ms + prefill_ms_per_ktok * prompt_tokens / 1000) / 1000)
+
+        if "Intent Classifier" in prompt:
+            content = "READY"
+        else:
+            content = " ".join(REPLY_WORDS[:reply_words])
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_chunks(completion_id, body.get("model", "stub"), content),
+                media_type="text/event-stream",
+            )
+        if token_ms:
+            await asyncio.sleep(token_ms * len(content.split()) / 1000)
+
+        completion_tokens = len(content.split())
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "system_fingerprint": "stub",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def stream_chunks(completion_id, model, content):
+        for i, word in enumerate(content.split()):
+            if token_ms and i:
+                await asyncio.sleep(token_ms / 1000)
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "system_fingerprint": "stub",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else " " + word},
+                    "finish_reason": None,
+                }],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        done = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "system_fingerprint": "stub",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(done)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.get("/stats")
+    async def stats():
+        # Each distinct client port is one TCP connection.
+        return {
+            "requests": app.state.requests,
+            "connections": len(app.state.peers),
+            "statuses": {str(k): v for k, v in app.state.statuses.items()},
+        }
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--reply-words", type=int, default=120)
+    parser.add_argument("--token-ms", type=float, default=0,
+                        help="Delay between generated tokens")
+    parser.add_argument("--prefill-ms-per-ktok", type=float, default=0,
+                        help="Extra time to first token per 1000 prompt words")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="Fraction of requests answered with 503")
+    parser.add_argument("--hang-rate", type=float, default=0,
+                        help="Fraction of requests that never answer")
+    parser.add_argument("--rpm-limit", type=float, default=0,
+                        help="Requests per minute before answering 429")
+    parser.add_argument("--unavailable-models", default="",
+                        help="Comma-separated models answered with 404")
+    args = parser.parse_args()
+
+    app = make_app(latency_ms=args.latency_ms, reply_words=args.reply_words,
+                   token_ms=args.token_ms, prefill_ms_per_ktok=args.prefill_ms_per_ktok,
+                   error_rate=args.error_rate, hang_rate=args.hang_rate, rpm_limit=args.rpm_limit,
+                   unavailable_models=tuple(filter(None, args.unavailable_models.split(","))))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
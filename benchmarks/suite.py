@@ -0,0 +1,283 @@
+"""End-to-end performance suite on the replay backend.
+
+Runs three workloads with LLM_BACKEND=replay (answers come from a recording or
+filler text with simulated latency; see src/replay.py) and the caches off, each
+in a fresh process so CPU and memory figures do not bleed into each other:
+
+* session: main.py-style sessions (a greeting, an idea, a follow-up) through
+  MultiAgentSystem.process_user_input, several sessions at a time.
+* api: /classify then /analyze flows against the API running under uvicorn.
+* batch: src.batch.run_ideas over a list of ideas.
+
+Each reports throughput, latency percentiles, CPU time per request and
+resident memory. Save a run as a JSON baseline and compare later runs with it;
+the exit status is 1 when a metric regressed by more than --tolerance, and 2
+(before running anything) when the workload settings differ from the
+baseline's:
+
+    python -m benchmarks.suite --save benchmarks/baselines/suite.json
+    python -m benchmarks.suite --compare benchmarks/baselines/suite.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from benchmarks.common import percentile, start_api
+
+SCENARIOS = ("session", "api", "batch")
+
+IDEAS = [
+    "A drone service that delivers hot coffee to office workers",
+    "Vertical farms inside abandoned shopping malls",
+    "A marketplace for renting out unused parking spots",
+    "Smart glasses that translate sign language in real time",
+    "Micro-insurance for gig economy workers",
+    "3D-printed houses for disaster relief",
+    "Peer-to-peer electric car charging",
+    "A subscription box for vegan pet food",
+]
+
+# Metrics where a higher value is better; the rest regress upwards.
+HIGHER_IS_BETTER = {"throughput_rps"}
+COMPARED = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "cpu_ms_per_request", "rss_mb")
+
+def idea(i):
+    return f"{IDEAS[i % len(IDEAS)]} (variant {i})"
+
+def proc_cpu_seconds(pid="self"):
+    """User + system CPU time of a process, from /proc."""
+    with open(f"/proc/{pid}/stat") as handle:
+        fields = handle.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def proc_memory_mb(pid="self"):
+    """(current, peak) resident memory of a process in MB, from /proc."""
+    memory = {}
+    with open(f"/proc/{pid}/status") as handle:
+        for line in handle:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                name, value = line.split(":")
+                memory[name] = int(value.split()[0]) / 1024
+    return memory.get("VmRSS", 0.0), memory.get("VmHWM", 0.0)
+
+def summarize(latencies, errors, elapsed, cpu_seconds, pid="self"):
+    rss, peak = proc_memory_mb(pid)
+    requests = len(latencies) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "cpu_ms_per_request": round(cpu_seconds * 1000 / max(1, requests), 2),
+        "rss_mb": round(rss, 1),
+        "peak_rss_mb": round(peak, 1),
+    }
+
+def run_session(args):
+    """Turns through MultiAgentSystem.process_user_input, like main.py."""
+    from src.orchestrator import MultiAgentSystem
+
+    def session(i):
+        system = MultiAgentSystem()
+        latencies, errors = [], 0
+        for turn in ("Hi there!", idea(i), "What is the biggest risk with it?"):
+            start = time.perf_counter()
+            try:
+                system.process_user_input(turn)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+        return latencies, errors
+
+    cpu, start = proc_cpu_seconds(), time.perf_counter()
+    # The orchestrator prints progress for the CLI; keep it out of the report.
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(session, range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for turn_latencies, _ in results for latency in turn_latencies]
+    errors = sum(e for _, e in results)
+    return summarize(latencies, errors, elapsed, proc_cpu_seconds() - cpu)
+
+def run_api(args):
+    """/classify -> /analyze flows against src.api under uvicorn."""
+    api, base_url = start_api()
+    try:
+        async def flows():
+            semaphore = asyncio.Semaphore(args.concurrency)
+            latencies, errors = [], 0
+
+            async def flow(client, i):
+                nonlocal errors
+                async with semaphore:
+                    start = time.perf_counter()
+                    try:
+                        response = await client.post("/classify", json={"idea": idea(i)})
+                        response.raise_for_status()
+                        session_id = response.json()["session_id"]
+                        response = await client.post("/analyze", json={"idea": idea(i), "session_id": session_id})
+                        response.raise_for_status()
+                        latencies.append(time.perf_counter() - start)
+                    except httpx.HTTPError:
+                        errors += 1
+
+            async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+                await asyncio.gather(*(flow(client, i) for i in range(args.flows)))
+            return latencies, errors
+
+        cpu, start = proc_cpu_seconds(api.pid), time.perf_counter()
+        latencies, errors = asyncio.run(flows())
+        elapsed = time.perf_counter() - start
+        return summarize(latencies, errors, elapsed, proc_cpu_seconds(api.pid) - cpu, api.pid)
+    finally:
+        api.terminate()
+        api.wait()
+
+def run_batch(args):
+    """src.batch.run_ideas over a list of ideas."""
+    from src.batch import run_ideas
+
+    records = []
+    items = [{"id": str(i), "idea": idea(i)} for i in range(args.ideas)]
+    cpu, start = proc_cpu_seconds(), time.perf_counter()
+    asyncio.run(run_ideas(items, records.append, concurrency=args.concurrency))
+    elapsed = time.perf_counter() - start
+    latencies = [r["seconds"] for r in records if "error" not in r]
+    return summarize(latencies, len(records) - len(latencies), elapsed, proc_cpu_seconds() - cpu)
+
+RUNNERS = {"session": run_session, "api": run_api, "batch": run_batch}
+
+def replay_env(args):
+    return {
+        "LLM_BACKEND": "replay",
+        "LLM_RECORDING": args.recording or "",
+        "REPLAY_TTFT_MS": str(args.ttft_ms),
+        "REPLAY_TTFT_P99_MS": str(args.ttft_p99_ms),
+        "REPLAY_TOKENS_PER_S": str(args.tokens_per_s),
+        "REPLAY_ERROR_RATE": str(args.error_rate),
+        "CACHE_ENABLED": "0",
+        "SEMANTIC_CACHE_ENABLED": "0",
+        # The archive's background writer would add CPU and a growing database to every run
+        "ARCHIVE_ENABLED": "0",
+        "SESSION_STORE": "memory",
+        "TRACE_EXPORT": "",
+    }
+
+def mismatched_settings(report, baseline):
+    """Workload settings that differ from the baseline's, as "name: old -> new" lines."""
+    current = report["meta"]["settings"]
+    before = baseline.get("meta", {}).get("settings", {})
+    return [
+        f"{name}: {before.get(name)!r} -> {value!r}"
+        for name, value in current.items()
+        # Comparing a subset of scenarios, or with another tolerance, is fine.
+        if name not in ("scenarios", "tolerance") and before.get(name) != value
+    ]
+
+def compare(report, baseline, tolerance):
+    """Print old vs new per metric; return the regressions beyond tolerance."""
+    regressions = []
+    print(f"\n{'scenario':<10}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>9}")
+    for scenario, metrics in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        for metric in COMPARED:
+            old, new = before.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "  REGRESSION" if worse > tolerance else ""
+            if flag:
+                regressions.append(f"{scenario}.{metric}")
+            print(f"{scenario:<10}{metric:<22}{old:>12}{new:>12}{change:>+9.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--sessions", type=int, default=16, help="main.py-style sessions (3 turns each)")
+    parser.add_argument("--flows", type=int, default=48, help="/classify -> /analyze flows")
+    parser.add_argument("--ideas", type=int, default=48, help="Ideas in the batch run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--recording", help="LLM recording to replay (default: filler replies)")
+    parser.add_argument("--ttft-ms", type=float, default=100)
+    parser.add_argument("--ttft-p99-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-s", type=float, default=2000)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--run", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process: run one scenario and print its metrics as JSON.
+        print(json.dumps(RUNNERS[args.run](args)))
+        return 0
+
+    # Replay settings reach the children through the environment.
+    env = dict(os.environ, **replay_env(args))
+    workload = ["--sessions", str(args.sessions), "--flows", str(args.flows),
+                "--ideas", str(args.ideas), "--concurrency", str(args.concurrency)]
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("save", "compare", "run")},
+        },
+        "scenarios": {},
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        mismatched = mismatched_settings(report, baseline)
+        if mismatched:
+            # A different workload would show up as false regressions (or improvements).
+            print(f"⚠️  Not comparing: the workload differs from {args.compare}:", file=sys.stderr)
+            for line in mismatched:
+                print(f"    {line}", file=sys.stderr)
+            return 2
+
+    for scenario in args.scenarios:
+        child = subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--run", scenario, *workload],
+            env=env, capture_output=True, text=True,
+        )
+        if child.returncode:
+            print(child.stderr, file=sys.stderr)
+            raise SystemExit(f"{scenario} scenario failed")
+        metrics = json.loads(child.stdout.strip().splitlines()[-1])
+        report["scenarios"][scenario] = metrics
+        print(f"{scenario:<8} {metrics['requests']:>5} req  {metrics['throughput_rps']:>7.2f} req/s  "
+              f"p50 {metrics['p50_ms']:>8.1f} ms  p95 {metrics['p95_ms']:>8.1f} ms  "
+              f"p99 {metrics['p99_ms']:>8.1f} ms  cpu {metrics['cpu_ms_per_request']:>7.2f} ms/req  "
+              f"rss {metrics['rss_mb']:>6.1f} MB  errors {metrics['errors']}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.compare:
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
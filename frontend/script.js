@@ -12,6 +12,26 @@ const researchAgentOutput = document.getElementById('researchAgentOutput');
 const conversationalAgentOutput = document.getElementById('conversationalAgentOutput');
 const finalConclusionOutput = document.getElementById('finalConclusionOutput');
 
+// API location: the API serves this page, so same-origin by default. Set
+// <meta name="api-base" content="http://host:port"> to use a separate API server;
+// the standalone frontend/server.py (port 8000) talks to the API on port 8001.
+const API_BASE = document.querySelector('meta[name="api-base"]')?.content
+    || (location.port === '8000' ? `${location.protocol}//${location.hostname}:8001` : '');
+
+// Session issued by the API; keeps this tab's conversation separate from other users
+let sessionId = sessionStorage.getItem('debaterSessionId');
+
+/**
+ * Remembers the session ID returned by the API
+ * @param {string} id - Session ID from a response
+ */
+function rememberSession(id) {
+    if (id && id !== sessionId) {
+        sessionId = id;
+        sessionStorage.setItem('debaterSessionId', id);
+    }
+}
+
 // ===================================
 // Mock Backend Function
 // ===================================
@@ -22,12 +42,12 @@ const finalConclusionOutput = document.getElementById('finalConclusionOutput');
  */
 async function getAgentOutputs(userInput) {
     try {
-        const response = await fetch('http://localhost:8001/analyze', {
+        const response = await fetch(`${API_BASE}/analyze`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ idea: userInput })
+            body: JSON.stringify({ idea: userInput, session_id: sessionId })
         });
 
         if (!response.ok) {
@@ -35,6 +55,7 @@ async function getAgentOutputs(userInput) {
         }
 
         const data = await response.json();
+        rememberSession(data.session_id);
 
         // Handle chat-only response
         if (data.type === 'chat') {
@@ -117,12 +138,13 @@ async function handleAnalyze() {
 
     try {
         // 1. Classify Intent
-        const classifyResponse = await fetch('http://localhost:8001/classify', {
+        const classifyResponse = await fetch(`${API_BASE}/classify`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ idea: userInput })
+            body: JSON.stringify({ idea: userInput, session_id: sessionId })
         });
         const classification = await classifyResponse.json();
+        rememberSession(classification.session_id);
 
         if (classification.type === 'chat') {
             // 2a. Chat Mode
@@ -132,12 +154,13 @@ async function handleAnalyze() {
             // Clear input immediately for better UX
             ideaInput.value = '';
 
-            const chatResponse = await fetch('http://localhost:8001/chat', {
+            const chatResponse = await fetch(`${API_BASE}/chat`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ idea: userInput })
+                body: JSON.stringify({ idea: userInput, session_id: sessionId })
             });
             const chatData = await chatResponse.json();
+            rememberSession(chatData.session_id);
 
             appendMessage(chatData.response, 'agent');
 
@@ -145,14 +168,7 @@ async function handleAnalyze() {
             // 2b. Analysis Mode
             analyzeBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Analyzing...';
 
-            const analyzeResponse = await fetch('http://localhost:8001/analyze', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ idea: userInput })
-            });
-            const analysisData = await analyzeResponse.json();
-
-            displayAnalysis(analysisData);
+            await streamAnalysis(userInput);
             showNotification('Analysis complete!', 'success');
         }
 
@@ -192,6 +208,77 @@ function appendMessage(text, sender) {
     }
 }
 
+// ===================================
+// Streaming Analysis
+// ===================================
+// Maps the agent names used by /analyze/stream to their output panels
+const streamPanels = {
+    research: researchAgentOutput,
+    optimist: goodAgentOutput,
+    devil: devilAgentOutput,
+    composer: finalConclusionOutput,
+    conversational: conversationalAgentOutput
+};
+
+/**
+ * Streams an analysis from /analyze/stream and fills the panels as tokens arrive
+ * @param {string} userInput - The user's idea description
+ */
+async function streamAnalysis(userInput) {
+    const response = await fetch(`${API_BASE}/analyze/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ idea: userInput, session_id: sessionId })
+    });
+
+    if (!response.ok) {
+        throw new Error(`API error: ${response.status}`);
+    }
+
+    // Show the (empty) panels straight away so tokens appear in place
+    document.getElementById('chatSection').classList.remove('active');
+    clearOutputs();
+    agentOutputsSection.classList.add('active');
+
+    const texts = {};
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const raw of events) {
+            if (!raw.startsWith('data: ')) continue;
+            const event = JSON.parse(raw.slice(6));
+
+            if (event.type === 'error') {
+                throw new Error(event.detail);
+            }
+            if (event.type === 'session') {
+                rememberSession(event.session_id);
+                continue;
+            }
+
+            const panel = streamPanels[event.agent];
+            if (!panel) continue;
+
+            if (event.type === 'token') {
+                texts[event.agent] = (texts[event.agent] || '') + event.text;
+                panel.textContent = texts[event.agent];
+            } else if (event.type === 'done') {
+                // Render Markdown once the agent has finished
+                panel.innerHTML = marked.parse(event.text);
+            }
+        }
+    }
+}
+
 function displayAnalysis(outputs) {
     // Hide chat, show analysis
     document.getElementById('chatSection').classList.remove('active');
@@ -1,3 +1,4 @@
+import sys
 from src.orchestrator import MultiAgentSystem
 
 def main():
@@ -40,4 +41,10 @@ def main():
             print(f"\n❌ An error occurred: {e}")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from src.batch import cli
+        sys.exit(cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from src.launcher import cli
+        sys.exit(cli(sys.argv[2:]))
     main()
@@ -0,0 +1,16 @@
+"""Shared prompt prefix for the optimist, devil and composer agents.
+
+All three calls start with the same system prompt and the same idea +
+research message, and only their last message differs. Keeping that leading
+prefix byte-identical lets provider-side prefix caching reuse it across the
+three calls of one analysis. Each agent's persona is in its role message.
+"""
+
+SYSTEM_PROMPT = """You are one agent in a multi-agent intelligence system that evaluates ideas. The idea and the research findings follow; the last message gives your role and instructions."""
+
+def build_prefix(user_input, research):
+    """The system prompt and idea + research message shared by the three agents."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Idea: {user_input}\n\nRESEARCH FINDINGS:\n{research}"},
+    ]
@@ -1,6 +1,7 @@
-from src.config import get_client, DEFAULT_MODEL
+from src.agents.analysis import build_prefix
+from src.llm import complete, acomplete, astream
 
-RESPONSE_COMPOSER_PROMPT = """You are a Response Composer Agent. Your role is to synthesize inputs from multiple specialist agents (Research Agent, Positive Analysis Agent, Flaw Finding Agent) and create a comprehensive, balanced, and well-structured final response.
+PERSONA = """You are a Response Composer Agent. Your role is to synthesize inputs from multiple specialist agents (Research Agent, Positive Analysis Agent, Flaw Finding Agent) and create a comprehensive, balanced, and well-structured final response.
 
 You receive:
 1. Research findings with historical context and evidence
@@ -17,28 +18,31 @@ Your job is to:
 Format your response with clear sections and provide a final recommendation or conclusion.
 CRITICAL: Keep the final synthesis under 200 words. Use bullet points for key takeaways."""
 
-def run_composer_agent(user_input, research, positives, flaws):
-    """Response Composer Agent - synthesizes all perspectives"""
-    client = get_client()
-    synthesis_prompt = f"""User Idea/Question: {user_input}
-
-RESEARCH FINDINGS:
-{research}
-
-POSITIVE ANALYSIS:
+ROLE_PROMPT = """POSITIVE ANALYSIS:
 {positives}
 
 CRITICAL ANALYSIS (FLAWS/RISKS):
 {flaws}
 
+""" + PERSONA + """
+
 Synthesize all these perspectives into a comprehensive, balanced, and actionable response."""
-    
-    messages = [
-        {"role": "system", "content": RESPONSE_COMPOSER_PROMPT},
-        {"role": "user", "content": synthesis_prompt}
+
+def build_messages(user_input, research, positives, flaws):
+    """Build the chat messages for the Response Composer Agent."""
+    return build_prefix(user_input, research) + [
+        {"role": "user", "content": ROLE_PROMPT.format(positives=positives, flaws=flaws)}
     ]
-    response = client.chat.completions.create(
-        messages=messages,
-        model=DEFAULT_MODEL,
-    )
-    return response.choices[0].message.content
+
+def run_composer_agent(user_input, research, positives, flaws):
+    """Response Composer Agent - synthesizes all perspectives"""
+    return complete(build_messages(user_input, research, positives, flaws), agent="composer")
+
+async def run_composer_agent_async(user_input, research, positives, flaws):
+    """Async Response Composer Agent - same prompt, non-blocking call."""
+    return await acomplete(build_messages(user_input, research, positives, flaws), agent="composer")
+
+async def stream_composer_agent(user_input, research, positives, flaws):
+    """Streaming Response Composer Agent - yields tokens as they are generated."""
+    async for token in astream(build_messages(user_input, research, positives, flaws), agent="composer"):
+        yield token
@@ -1,17 +1,10 @@
-from src.config import get_client, DEFAULT_MODEL
+import re
+from src.context import fit_history
+from src.llm import complete, acomplete, astream
 
 SYSTEM_PROMPT = """You are a Conversational AI Agent designed to interact naturally, understand context, and give intelligent, emotionally aware, and logically structured responses. Your job is to maintain smooth, human-like conversations by understanding the user’s intent, tone, and emotions while providing accurate, helpful, and context-aware replies. You should remember previous parts of the conversation (within the session), ask clarifying questions when necessary, and adapt your response style based on the user’s mood—friendly when they are casual, professional when they need formal help, and supportive when they feel confused or stressed. Always avoid unnecessary complexity and communicate in clear, meaningful language. Provide examples, analogies, or step-by-step explanations when the user might not understand a concept. When the user shares ideas, problems, or tasks, respond like a thoughtful partner—sometimes guiding, sometimes challenging, sometimes suggesting better alternatives, and always helping them think deeper. Keep responses engaging, concise, empathetic, and context-aware. Above all, behave like a reliable conversational companion who listens carefully, thinks intelligently, and communicates with clarity, respect, and emotional intelligence.\n\nCRITICAL: Keep your responses concise (under 100 words) unless explaining a complex concept."""
 
-def check_if_ready(user_input, history):
-    """Determines if the user has provided enough information for a full analysis."""
-    
-    # Hard heuristic: If input is very short, it's likely just a greeting or not enough context.
-    if len(user_input.strip()) < 10:
-        return False
-
-    client = get_client()
-    
-    router_prompt = """You are an Intent Classifier. Your job is to determine if the user has provided a concrete idea, problem, or topic that is ready for deep analysis.
+ROUTER_PROMPT = """You are an Intent Classifier. Your job is to determine if the user has provided a concrete idea, problem, or topic that is ready for deep analysis.
 
     CRITICAL RULES:
     - Return "NOT_READY" for greetings like "hi", "hello", "hey", "good morning".
@@ -21,73 +14,217 @@ def check_if_ready(user_input, history):
 
     User Input: "{}"
     
-    Response (READY or NOT_READY only):""".format(user_input)
+    Response (READY or NOT_READY only):"""
 
-    response = client.chat.completions.create(
-        messages=[{"role": "user", "content": router_prompt}],
-        model=DEFAULT_MODEL,
-    )
-    result = response.choices[0].message.content.strip().upper()
-    return "READY" in result
-
-def run_chat_mode(user_input, history):
-    """Standard conversational response when analysis is not yet needed."""
-    client = get_client()
-    
-    # Add to history
-    history.append({"role": "user", "content": user_input})
-    
-    chat_prompt = """You are a helpful AI Assistant. The user is chatting with you but hasn't provided a full idea for analysis yet.
+CHAT_PROMPT = """You are a helpful AI Assistant. The user is chatting with you but hasn't provided a full idea for analysis yet.
     
     Your goal is to:
     1. Respond naturally to their greeting or question.
     2. Gently encourage them to share an idea, startup concept, or problem they want to analyze.
     3. Be brief and engaging.
     
-    User Input: {}""".format(user_input)
-    
-    # We use a temporary history for this chat turn to avoid polluting the main context too much, 
-    # or we can just append to main history. Let's append to main history for continuity.
-    
-    response = client.chat.completions.create(
-        messages=history + [{"role": "system", "content": chat_prompt}], # Inject specific instruction for this turn
-        model=DEFAULT_MODEL,
-    )
-    
-    reply = response.choices[0].message.content
-    history.append({"role": "assistant", "content": reply})
-    return reply
+    User Input: {}"""
 
-def run_conversational_agent(user_input, final_response, history):
-    """Conversational Agent - manages the interaction and maintains context"""
-    client = get_client()
-    
-    # Add to conversation history
+def build_router_messages(user_input):
+    """Build the single-turn router request used by check_if_ready."""
+    return [{"role": "user", "content": ROUTER_PROMPT.format(user_input)}]
+
+_ROUTER_LABEL_RE = re.compile(r"NOT[\s_]*READY|READY")
+
+def router_label(reply):
+    """The first READY / NOT_READY in the router's reply, or None if it has neither."""
+    match = _ROUTER_LABEL_RE.search(reply.upper())
+    if match is None:
+        return None
+    return "READY" if match.group() == "READY" else "NOT_READY"
+
+def parse_router_reply(reply):
+    """Map the router's reply to a boolean; NOT_READY and unclear replies are False."""
+    return router_label(reply) == "READY"
+
+GREETINGS = {
+    "hi", "hii", "hey", "hello", "hola", "yo", "sup", "howdy", "greetings",
+    "thanks", "thank", "you", "ok", "okay", "cool", "bye", "morning", "evening",
+    "afternoon", "good", "there",
+}
+
+# Only matched against the whole input: "help me evaluate drone coffee
+# delivery" is a real request and goes to the router.
+VAGUE_PHRASES = {
+    "i have an idea", "i have a question", "help me", "can you help", "can you help me",
+    "start", "let's start", "lets start", "who are you", "what can you do",
+    "how are you", "what do you do", "what is this",
+}
+
+# Openings that only show up when someone pitches something ("An app that
+# ..."). Matched at the start of the input only, since "I work at a company
+# that ..." is not a pitch; anything else is left to the router.
+IDEA_OPENERS = (
+    "app that", "platform that", "service that", "startup that", "business that",
+    "marketplace for", "device that", "company that",
+)
+
+QUESTION_WORDS = {
+    "is", "are", "can", "could", "would", "will", "should", "do", "does", "did",
+    "what", "how", "why", "who", "where", "when", "which", "explain", "tell",
+}
+
+def normalize_input(user_input):
+    """Lowercase and collapse whitespace/punctuation so equivalent inputs match."""
+    return " ".join(re.sub(r"[^\w\s:']", " ", user_input.lower()).split())
+
+def quick_classify(user_input):
+    """Local pre-classifier for obvious cases.
+
+    Returns True (ready for analysis), False (chat) or None when the LLM router
+    has to decide.
+    """
+    # Hard heuristic: If input is very short, it's likely just a greeting or not enough context.
+    if len(user_input.strip()) < 10:
+        return False
+
+    text = normalize_input(user_input)
+    words = text.split()
+    if not words:
+        return False
+
+    if all(word in GREETINGS for word in words):
+        return False
+    if text.rstrip(":'") in VAGUE_PHRASES:
+        return False
+    # Questions ("is there a tool for this?") may or may not be ideas
+    if user_input.strip().endswith("?") or words[0] in QUESTION_WORDS:
+        return None
+    opening = " ".join(words[1:] if words[0] in ("a", "an") else words)
+    if len(words) >= 4 and any(opening.startswith(opener + " ") for opener in IDEA_OPENERS):
+        return True
+    return None
+
+def check_if_ready(user_input, history):
+    """Determines if the user has provided enough information for a full analysis."""
+    ready = quick_classify(user_input)
+    if ready is not None:
+        return ready
+
+    return parse_router_reply(complete(build_router_messages(user_input), agent="router"))
+
+async def check_if_ready_async(user_input, history):
+    """Async variant of check_if_ready."""
+    ready = quick_classify(user_input)
+    if ready is not None:
+        return ready
+
+    return parse_router_reply(await acomplete(build_router_messages(user_input), agent="router"))
+
+def build_chat_messages(user_input, history):
+    """Record the user's turn in history and build the chat-mode request."""
+    # Add to history, folding old turns if it has outgrown the token budget
     history.append({"role": "user", "content": user_input})
-    history.append({"role": "assistant", "content": final_response})
+    fit_history(history)
     
-    # Generate conversational response
-    context_prompt = f"""The user asked: "{user_input}"
+    # We append to main history for continuity and inject the chat-mode
+    # instruction only for this turn.
+    return history + [{"role": "system", "content": CHAT_PROMPT.format(user_input)}]
+
+def run_chat_mode(user_input, history):
+    """Standard conversational response when analysis is not yet needed."""
+    reply = complete(build_chat_messages(user_input, history), agent="chat")
+    history.append({"role": "assistant", "content": reply})
+    return reply
 
-Our multi-agent analysis produced this comprehensive response:
-{final_response}
+async def run_chat_mode_async(user_input, history):
+    """Async variant of run_chat_mode."""
+    reply = await acomplete(build_chat_messages(user_input, history), agent="chat")
+    history.append({"role": "assistant", "content": reply})
+    return reply
 
-Deliver this information in a natural, conversational way that:
+DELIVERY_PROMPT = """Deliver the analysis above to the user in a natural, conversational way that:
 - Acknowledges their question with empathy
 - Presents the information clearly and engagingly
 - Maintains context from our conversation
 - Offers to clarify or explore any aspect further
 
 Be warm, helpful, and conversational while preserving all the analytical depth."""
+
+def build_conversational_messages(user_input, final_response, history):
+    """Record the question in history and build the delivery request.
+
+    The analysis is sent once, as the assistant turn being delivered. Only the
+    delivered reply is kept in history afterwards, since it restates it.
+    """
+    history.append({"role": "user", "content": user_input})
+    fit_history(history)
+    return history + [
+        {"role": "assistant", "content": final_response},
+        {"role": "user", "content": DELIVERY_PROMPT},
+    ]
+
+def run_conversational_agent(user_input, final_response, history):
+    """Conversational Agent - manages the interaction and maintains context"""
+    final_conversational = complete(build_conversational_messages(user_input, final_response, history), agent="conversational")
+    history.append({"role": "assistant", "content": final_conversational})
     
-    history.append({"role": "user", "content": context_prompt})
-    
-    conversational_response = client.chat.completions.create(
-        messages=history,
-        model=DEFAULT_MODEL,
-    )
-    
-    final_conversational = conversational_response.choices[0].message.content
+    return final_conversational
+
+async def run_conversational_agent_async(user_input, final_response, history):
+    """Async variant of run_conversational_agent."""
+    final_conversational = await acomplete(build_conversational_messages(user_input, final_response, history), agent="conversational")
     history.append({"role": "assistant", "content": final_conversational})
     
     return final_conversational
+
+async def stream_chat_mode(user_input, history):
+    """Streaming variant of run_chat_mode; records the full reply when done."""
+    tokens = []
+    async for token in astream(build_chat_messages(user_input, history), agent="chat"):
+        tokens.append(token)
+        yield token
+    history.append({"role": "assistant", "content": "".join(tokens)})
+
+async def stream_conversational_agent(user_input, final_response, history):
+    """Streaming variant of run_conversational_agent; records the full reply when done."""
+    tokens = []
+    async for token in astream(build_conversational_messages(user_input, final_response, history), agent="conversational"):
+        tokens.append(token)
+        yield token
+    history.append({"role": "assistant", "content": "".join(tokens)})
+
+DELIVERY_MARKER = "===DELIVERY==="
+
+def build_merged_delivery_messages(user_input, research, positives, flaws, history):
+    """Build one request that both synthesizes the analysis and delivers it.
+
+    Used when MERGE_DELIVERY is on, replacing the separate composer and
+    conversational calls.
+    """
+    from src.agents.analysis import build_prefix
+    from src.agents.composer import ROLE_PROMPT
+
+    analysis_prompt = build_prefix(user_input, research)[1]["content"]
+    history.append({"role": "user", "content": user_input})
+    fit_history(history)
+
+    merged_prompt = f"""{analysis_prompt}
+
+{ROLE_PROMPT.format(positives=positives, flaws=flaws)}
+
+After the synthesis, write a line containing only {DELIVERY_MARKER} and then deliver it to the user in a natural, conversational way that:
+- Acknowledges their question with empathy
+- Presents the information clearly and engagingly
+- Maintains context from our conversation
+- Offers to clarify or explore any aspect further"""
+    return history + [{"role": "user", "content": merged_prompt}]
+
+def split_merged_reply(reply):
+    """Split a merged reply into (final_response, conversational_response)."""
+    if DELIVERY_MARKER not in reply:
+        return reply.strip(), reply.strip()
+    final_response, delivery = reply.split(DELIVERY_MARKER, 1)
+    return final_response.strip(), delivery.strip()
+
+async def run_merged_delivery_async(user_input, research, positives, flaws, history):
+    """Composer and Conversational Agent in a single call."""
+    reply = await acomplete(build_merged_delivery_messages(user_input, research, positives, flaws, history), agent="conversational")
+    final_response, delivery = split_merged_reply(reply)
+    history.append({"role": "assistant", "content": delivery})
+    return final_response, delivery
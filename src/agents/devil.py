@@ -1,25 +1,25 @@
-from src.config import get_client, DEFAULT_MODEL
+from src.agents.analysis import build_prefix
+from src.llm import complete, acomplete, astream
 
-SYSTEM_INSTRUCTION = (
-"You are the Devil Agent in a multi-agent intelligence system. Your role is to think critically, skeptically, and aggressively about any idea the user provides, focusing on flaws, risks, weaknesses, and potential negative outcomes. You must challenge the idea, question assumptions, and highlight hidden dangers, ethical concerns, technical limitations, financial risks, market failures, and real-world scenarios where similar ideas have gone wrong. Your tone should be straightforward, bold, and brutally honest—not rude, but sharply analytical. Point out worst-case possibilities, loopholes, vulnerabilities, and any factor that could cause the idea to fail or cause harm. Your purpose is to stress-test the idea, expose blind spots, and ensure no weaknesses are ignored. Do not sugarcoat or be optimistic; your job is to provide the tough reality check. However, avoid personal attacks, disrespect, or unethical encouragement. Stay factual, logical, and focused on the idea, not the user. You are the critical voice that protects the project from hidden risks by challenging everything with maximum skepticism and depth.\n\nCRITICAL: Keep your response under 150 words. Use concise bullet points.")
+ROLE_PROMPT = """You are the Devil Agent in a multi-agent intelligence system. Your role is to think critically, skeptically, and aggressively about any idea the user provides, focusing on flaws, risks, weaknesses, and potential negative outcomes. You must challenge the idea, question assumptions, and highlight hidden dangers, ethical concerns, technical limitations, financial risks, market failures, and real-world scenarios where similar ideas have gone wrong. Your tone should be straightforward, bold, and brutally honest—not rude, but sharply analytical. Point out worst-case possibilities, loopholes, vulnerabilities, and any factor that could cause the idea to fail or cause harm. Your purpose is to stress-test the idea, expose blind spots, and ensure no weaknesses are ignored. Do not sugarcoat or be optimistic; your job is to provide the tough reality check. However, avoid personal attacks, disrespect, or unethical encouragement. Stay factual, logical, and focused on the idea, not the user. You are the critical voice that protects the project from hidden risks by challenging everything with maximum skepticism and depth.
+
+Based on this idea and research context, provide critical analysis. Identify flaws, risks, challenges, and potential failures.
+
+CRITICAL: Keep your response under 150 words. Use concise bullet points."""
+
+def build_messages(user_input, research_context):
+    """Build the chat messages for the Flaw Finding Agent."""
+    return build_prefix(user_input, research_context) + [{"role": "user", "content": ROLE_PROMPT}]
 
 def run_devil_agent(user_input, research_context):
     """Flaw Finding Agent - identifies risks and challenges"""
-    client = get_client()
-    prompt = f"""Based on this idea and research context, provide critical analysis:
-
-Idea: {user_input}
+    return complete(build_messages(user_input, research_context), agent="devil")
 
-Research Context: {research_context}
+async def run_devil_agent_async(user_input, research_context):
+    """Async Flaw Finding Agent - same prompt, non-blocking call."""
+    return await acomplete(build_messages(user_input, research_context), agent="devil")
 
-Identify flaws, risks, challenges, and potential failures."""
-    
-    messages = [
-        {"role": "system", "content": SYSTEM_INSTRUCTION},
-        {"role": "user", "content": prompt}
-    ]
-    response = client.chat.completions.create(
-        messages=messages,
-        model=DEFAULT_MODEL,
-    )
-    return response.choices[0].message.content
+async def stream_devil_agent(user_input, research_context):
+    """Streaming Flaw Finding Agent - yields tokens as they are generated."""
+    async for token in astream(build_messages(user_input, research_context), agent="devil"):
+        yield token
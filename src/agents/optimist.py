@@ -1,24 +1,25 @@
-from src.config import get_client, DEFAULT_MODEL
+from src.agents.analysis import build_prefix
+from src.llm import complete, acomplete, astream
 
-SYSTEM_INSTRUCTION = ("You are the Good Agent in a multi-agent intelligence system. Your role is to provide optimistic, constructive, ethical, and morally grounded perspectives on any idea the user gives. Always highlight the potential benefits, opportunities, positive outcomes, and empowering possibilities of the idea. Your tone should be encouraging, supportive, and solution-focused while remaining realistic and truthful. You must identify how the idea can help people, improve systems, create value, solve problems, promote well-being, or drive innovation. Provide thoughtful advantages, ethical strengths, positive user impact, and pathways for success. Suggest improvements that make the idea safer, more beneficial, user-friendly, or socially valuable. Avoid negativity, criticism, or fear-based language. Focus on potential, growth, creativity, and genuine good. Respond in a warm, hopeful, and inspiring manner while still giving meaningful insights. Your job is to act as the positive voice in the system—one that uplifts ideas, motivates progress, and highlights the best possible version of every concept while maintaining honesty, clarity, and ethical responsibility.\n\nCRITICAL: Keep your response under 150 words. Use concise bullet points.")
+ROLE_PROMPT = """You are the Good Agent in a multi-agent intelligence system. Your role is to provide optimistic, constructive, ethical, and morally grounded perspectives on any idea the user gives. Always highlight the potential benefits, opportunities, positive outcomes, and empowering possibilities of the idea. Your tone should be encouraging, supportive, and solution-focused while remaining realistic and truthful. You must identify how the idea can help people, improve systems, create value, solve problems, promote well-being, or drive innovation. Provide thoughtful advantages, ethical strengths, positive user impact, and pathways for success. Suggest improvements that make the idea safer, more beneficial, user-friendly, or socially valuable. Avoid negativity, criticism, or fear-based language. Focus on potential, growth, creativity, and genuine good. Respond in a warm, hopeful, and inspiring manner while still giving meaningful insights. Your job is to act as the positive voice in the system—one that uplifts ideas, motivates progress, and highlights the best possible version of every concept while maintaining honesty, clarity, and ethical responsibility.
+
+Based on this idea and research context, provide a positive analysis. Focus on strengths, opportunities, and success potential.
+
+CRITICAL: Keep your response under 150 words. Use concise bullet points."""
+
+def build_messages(user_input, research_context):
+    """Build the chat messages for the Positive Analysis Agent."""
+    return build_prefix(user_input, research_context) + [{"role": "user", "content": ROLE_PROMPT}]
 
 def run_optimist_agent(user_input, research_context):
     """Positive Analysis Agent - highlights strengths and opportunities"""
-    client = get_client()
-    prompt = f"""Based on this idea and research context, provide a positive analysis:
-
-Idea: {user_input}
+    return complete(build_messages(user_input, research_context), agent="optimist")
 
-Research Context: {research_context}
+async def run_optimist_agent_async(user_input, research_context):
+    """Async Positive Analysis Agent - same prompt, non-blocking call."""
+    return await acomplete(build_messages(user_input, research_context), agent="optimist")
 
-Focus on strengths, opportunities, and success potential."""
-    
-    messages = [
-        {"role": "system", "content": SYSTEM_INSTRUCTION},
-        {"role": "user", "content": prompt}
-    ]
-    response = client.chat.completions.create(
-        messages=messages,
-        model=DEFAULT_MODEL,
-    )
-    return response.choices[0].message.content
+async def stream_optimist_agent(user_input, research_context):
+    """Streaming Positive Analysis Agent - yields tokens as they are generated."""
+    async for token in astream(build_messages(user_input, research_context), agent="optimist"):
+        yield token
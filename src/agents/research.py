@@ -1,4 +1,4 @@
-from src.config import get_client, DEFAULT_MODEL
+from src.llm import complete, acomplete, astream
 
 SYSTEM_PROMPT = """You are a Research Analyst Agent. Whenever the user gives an idea, your job is to:
 
@@ -17,15 +17,22 @@ Use simple, clear, structured explanations while ensuring every insight is based
 
 CRITICAL: Keep your response under 150 words. Use bullet points for readability."""
 
-def run_research_agent(user_input):
-    """Research Agent that analyzes ideas with historical context and evidence."""
-    client = get_client()
-    messages = [
+def build_messages(user_input):
+    """Build the chat messages for the Research Agent."""
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": user_input}
     ]
-    response = client.chat.completions.create(
-        messages=messages,
-        model=DEFAULT_MODEL,
-    )
-    return response.choices[0].message.content
+
+def run_research_agent(user_input):
+    """Research Agent that analyzes ideas with historical context and evidence."""
+    return complete(build_messages(user_input), agent="research")
+
+async def run_research_agent_async(user_input):
+    """Async Research Agent - same prompt, non-blocking call."""
+    return await acomplete(build_messages(user_input), agent="research")
+
+async def stream_research_agent(user_input):
+    """Streaming Research Agent - yields tokens as they are generated."""
+    async for token in astream(build_messages(user_input), agent="research"):
+        yield token
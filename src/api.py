@@ -1,10 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from src.orchestrator import MultiAgentSystem
+from typing import List, Optional, Union
+from src.sessions import create_store
+from src.clients import aclose_clients, close_clients
+from src.cache import bypass_cache, cache_stats
+from src.batch import BatchJobs
+from src.archive import close_archive, get_archive
+from src.static import StaticSite, cache_control, etag_matches
+from src.config import BATCH_CONCURRENCY, BATCH_RATE
+from src.gateway import Overloaded, gateway
+from src.metrics import HTTP_SECONDS, render_prometheus, start_trace, end_trace, span, trace_id_from_traceparent
+import asyncio
+import contextlib
+import json
 import uvicorn
 
-app = FastAPI(title="Debater AI API")
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    # Shutdown: close the LLM clients, write what the archive has queued, close the session store
+    await aclose_clients()
+    close_clients()
+    await asyncio.to_thread(close_archive)
+    sessions.close()
+
+app = FastAPI(title="Debater AI API", lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -15,42 +37,88 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize system
-system = MultiAgentSystem()
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Give every request a trace ID (from traceparent if sent) and time it."""
+    token = start_trace(trace_id_from_traceparent(request.headers.get("traceparent")))
+    try:
+        with span(f"{request.method} {request.url.path}", path=request.url.path) as request_span:
+            response = await call_next(request)
+            request_span.set(status=response.status_code)
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        HTTP_SECONDS.observe(request_span.duration, path=path, status=response.status_code)
+        response.headers["X-Trace-Id"] = request_span.trace_id
+        return response
+    finally:
+        end_trace(token)
+
+# Per-session state: every client gets its own MultiAgentSystem
+sessions = create_store()
+
+# Background batch analyses, paged through GET /analyze/batch/{job_id}
+batch_jobs = BatchJobs()
+
+# The web UI in frontend/, served by the catch-all route at the end of this file
+site = StaticSite()
+
+def error_response(e):
+    """Map an exception to an HTTPException: 503 + Retry-After when overloaded."""
+    if isinstance(e, Overloaded):
+        return HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
+    return HTTPException(status_code=500, detail=str(e))
 
 class IdeaRequest(BaseModel):
     idea: str
+    session_id: Optional[str] = None
+    no_cache: bool = False  # Skip the response cache for this request
+
+@app.post("/session")
+async def create_session():
+    """Issue a new session ID; requests without one get a fresh session too."""
+    async with sessions.session() as (session_id, _):
+        return {"session_id": session_id}
 
 @app.post("/classify")
 async def classify_intent(request: IdeaRequest):
     try:
-        intent = system.check_intent(request.idea)
-        return {"type": intent}
+        async with sessions.session(request.session_id) as (session_id, system):
+            with bypass_cache(request.no_cache):
+                intent = await system.check_intent_async(request.idea)
+        return {"type": intent, "session_id": session_id}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise error_response(e)
 
 @app.post("/chat")
 async def chat_mode(request: IdeaRequest):
     try:
-        response = system.run_chat(request.idea)
-        return {"response": response}
+        async with sessions.session(request.session_id) as (session_id, system):
+            response = await system.run_chat_async(request.idea)
+        return {"response": response, "session_id": session_id}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise error_response(e)
 
 @app.post("/analyze")
 async def analyze_idea(request: IdeaRequest):
     try:
-        # Force analysis path (orchestrator will still run check_intent internally if we call process_user_input,
+        # Force analysis path (orchestrator will still run check_intent internally if we call process_user_input_async,
         # but we can assume the frontend only calls this if intent is 'analysis' or user forced it).
-        # However, process_user_input handles both. Let's keep using it but expect a dict.
+        # However, process_user_input_async handles both. Let's keep using it but expect a dict.
         
-        result = system.process_user_input(request.idea)
+        async with sessions.session(request.session_id) as (session_id, system):
+            with bypass_cache(request.no_cache):
+                result = await system.process_user_input_async(request.idea)
         
         if isinstance(result, str):
             # Fallback if it decided to chat anyway (shouldn't happen if frontend logic is correct, but good for safety)
             return {
                 "type": "chat",
-                "conversationalAgent": result
+                "conversationalAgent": result,
+                "session_id": session_id
             }
         else:
             # Full analysis
@@ -60,11 +128,129 @@ async def analyze_idea(request: IdeaRequest):
                 "goodAgent": result.get("positives"),
                 "devilAgent": result.get("flaws"),
                 "finalConclusion": result.get("final_response"),
-                "conversationalAgent": result.get("conversational_response")
+                "conversationalAgent": result.get("conversational_response"),
+                "session_id": session_id
             }
             
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise error_response(e)
+
+@app.post("/analyze/stream")
+async def analyze_idea_stream(request: IdeaRequest):
+    """Server-Sent Events version of /analyze that pushes tokens as they arrive."""
+    async def events():
+        try:
+            async with sessions.session(request.session_id) as (session_id, system):
+                yield f"data: {json.dumps({'type': 'session', 'session_id': session_id})}\n\n"
+                with bypass_cache(request.no_cache):
+                    async for event in system.stream_user_input(request.idea):
+                        yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            # Headers are already sent, so report failures in-band.
+            error = {"type": "error", "detail": str(e)}
+            if isinstance(e, Overloaded):
+                error["retry_after"] = e.retry_after
+            yield f"data: {json.dumps(error)}\n\n"
+        yield f"data: {json.dumps({'type': 'end'})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+class BatchItem(BaseModel):
+    idea: str
+    id: Optional[Union[int, str]] = None  # as in the CLI's JSONL input; 0 is kept
+
+class BatchRequest(BaseModel):
+    ideas: List[Union[str, BatchItem]]  # plain ideas or {"id": ..., "idea": ...}
+    concurrency: int = BATCH_CONCURRENCY
+    rate: float = BATCH_RATE  # ideas started per second, 0 = unlimited
+    no_cache: bool = False
+
+@app.post("/analyze/batch")
+async def analyze_batch(request: BatchRequest):
+    """Start a background batch analysis and return its job ID."""
+    if not request.ideas:
+        raise HTTPException(status_code=400, detail="No ideas given")
+    # The job task inherits this context, including the cache bypass.
+    with bypass_cache(request.no_cache):
+        items = [item if isinstance(item, str) else {"idea": item.idea, "id": item.id} for item in request.ideas]
+        job = batch_jobs.submit(items, max(1, request.concurrency), max(0.0, request.rate))
+    return {"job_id": job.id, "total": len(job.items), "status": job.status}
+
+@app.get("/analyze/batch/{job_id}")
+async def get_batch(job_id: str, offset: int = 0, limit: int = 50):
+    """Job status plus one page of results, in completion order."""
+    job = batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown batch job")
+    return job.page(max(0, offset), min(max(1, limit), 500))
+
+def archive_or_404():
+    archive = get_archive()
+    if archive is None:
+        raise HTTPException(status_code=404, detail="The analysis archive is disabled")
+    return archive
+
+# /analyses/search is declared before /analyses/{analysis_id} so it is not taken for an ID.
+@app.get("/analyses")
+async def list_analyses(offset: int = 0, limit: int = 20, session_id: Optional[str] = None):
+    """Archived analyses, newest first, optionally of one session."""
+    archive = archive_or_404()
+    return await asyncio.to_thread(archive.list, max(0, offset), min(max(1, limit), 100), session_id)
+
+@app.get("/analyses/search")
+async def search_analyses(q: str, offset: int = 0, limit: int = 20):
+    """Full-text search over archived analyses, with a snippet.
+
+    Every word must match. The newest 2000 matches come first, best first;
+    paging continues through older matches, newest first. Queries with a
+    word found in most analyses are ordered newest first throughout.
+    """
+    archive = archive_or_404()
+    return await asyncio.to_thread(archive.search, q, max(0, offset), min(max(1, limit), 100))
+
+@app.get("/analyses/{analysis_id}")
+async def get_analysis(analysis_id: int):
+    """One archived analysis with all agent outputs and metadata."""
+    analysis = await asyncio.to_thread(archive_or_404().get, analysis_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Unknown analysis")
+    return analysis
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-agent latency, queue wait, TTFT, tokens, cache and errors."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the agent response cache and the near-duplicate cache."""
+    from src.semantic_cache import semantic_stats
+    return {**cache_stats(), "semantic": semantic_stats()}
+
+@app.get("/gateway/stats")
+async def get_gateway_stats():
+    """Calls, retries, shed load and current limits of the LLM gateway."""
+    return gateway.snapshot()
+
+# Declared last so every API route above takes precedence.
+@app.get("/{path:path}", include_in_schema=False)
+async def frontend(path: str, request: Request, v: Optional[str] = None):
+    """The web UI: ETag revalidation, year-long caching of versioned assets, br/gzip."""
+    asset = site.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    headers = {"ETag": f'"{asset.etag}"', "Cache-Control": cache_control(asset, v), "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), asset):
+        return Response(status_code=304, headers=headers)
+    encoding, body = asset.variant(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = f'"{asset.etag}-{encoding}"'
+    return Response(body, media_type=asset.content_type, headers=headers)
 
 if __name__ == "__main__":
     uvicorn.run("src.api:app", host="0.0.0.0", port=8001, reload=True)
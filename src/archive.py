@@ -0,0 +1,273 @@
+"""Append-only archive of every finished analysis, with full-text search.
+
+Each analysis (idea, research, positives, flaws, final conclusion, the
+conversational reply and some metadata) is appended to a SQLite table with an
+FTS5 index over the text columns. Requests only put the record on a queue; a
+background thread writes queued records in batches, so archiving never adds
+latency to an analysis. Rows are never updated or deleted.
+"""
+import atexit
+import json
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from src.config import ARCHIVE_ENABLED, ARCHIVE_DB_PATH, ARCHIVE_QUEUE_SIZE
+
+TEXT_FIELDS = ("idea", "research", "positives", "flaws", "final_response", "conversational_response")
+
+# BM25 weights for idea, research, positives, flaws, final_response, conversational_response.
+RANK_WEIGHTS = "4.0, 1.0, 1.0, 1.0, 2.0, 0.5"
+
+# BM25 has to visit every match, so a search ranks only the newest
+# SEARCH_WINDOW matches; older matches follow, newest first. Words found in
+# more than COMMON_SHARE of all analyses would make BM25 walk all of their
+# matches to count them, so a query with such a word is not ranked at all:
+# its matches (still of every word) come newest first.
+SEARCH_WINDOW = 2000
+COMMON_SHARE = 0.2
+
+# Most records written in one transaction by the background writer.
+BATCH_SIZE = 500
+
+_WORD_RE = re.compile(r"\w+")
+
+def fts_terms(text):
+    """Turn free text into FTS5 terms, all of which must match.
+
+    Words are quoted so user input cannot inject FTS5 syntax (or prefix
+    queries, which FTS5 answers by merging every matching doclist).
+    """
+    return [f'"{word}"' for word in _WORD_RE.findall(text)]
+
+class AnalysisArchive:
+    """SQLite + FTS5 store fed by a background writer thread."""
+
+    def __init__(self, path=ARCHIVE_DB_PATH, queue_size=ARCHIVE_QUEUE_SIZE):
+        self.path = path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY,
+                created REAL NOT NULL,
+                session_id TEXT,
+                idea TEXT NOT NULL,
+                research TEXT,
+                positives TEXT,
+                flaws TEXT,
+                final_response TEXT,
+                conversational_response TEXT,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS analyses_session ON analyses (session_id, id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+                idea, research, positives, flaws, final_response, conversational_response,
+                content='analyses', content_rowid='id'
+            );
+        """)
+        # Weight matches in the idea and the conclusion above the long research text.
+        conn.execute(f"INSERT INTO analyses_fts (analyses_fts, rank) VALUES ('rank', 'bm25({RANK_WEIGHTS})')")
+        conn.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name="archive-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        """One connection per thread; WAL lets readers run while the writer commits."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, record, session_id=None, **metadata):
+        """Queue an analysis for writing; never blocks. Returns False if the queue is full."""
+        row = {field: record.get(field) for field in TEXT_FIELDS[1:]}
+        row["idea"] = record.get("user_input") or record.get("idea") or ""
+        row["session_id"] = session_id
+        row["created"] = time.time()
+        row["metadata"] = json.dumps(metadata) if metadata else None
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            print(f"⚠️  Archive queue full, not archiving: {row['idea'][:60]!r}")
+            return False
+        return True
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < BATCH_SIZE:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+            if rows:
+                try:
+                    self._write(conn, rows)
+                except sqlite3.Error as e:
+                    print(f"❌ Could not archive {len(rows)} analyses: {e}")
+            for _ in range(len(rows) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, conn, rows):
+        with conn:
+            for row in rows:
+                cursor = conn.execute(
+                    "INSERT INTO analyses (created, session_id, idea, research, positives, flaws, "
+                    "final_response, conversational_response, metadata) "
+                    "VALUES (:created, :session_id, :idea, :research, :positives, :flaws, "
+                    ":final_response, :conversational_response, :metadata)",
+                    row,
+                )
+                conn.execute(
+                    "INSERT INTO analyses_fts (rowid, idea, research, positives, flaws, "
+                    "final_response, conversational_response) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, *(row[field] for field in TEXT_FIELDS)),
+                )
+
+    def flush(self):
+        """Block until everything queued so far is written."""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer."""
+        self._queue.put(None)
+        self._writer.join()
+
+    @staticmethod
+    def _summary(row):
+        summary = {
+            "id": row["id"],
+            "created": row["created"],
+            "session_id": row["session_id"],
+            "idea": row["idea"],
+            "conclusion": (row["final_response"] or "")[:280],
+        }
+        if "snippet" in row.keys():
+            summary["snippet"] = row["snippet"]
+        return summary
+
+    def list(self, offset=0, limit=20, session_id=None):
+        """Newest first. next_offset in the result is None on the last page."""
+        sql = "SELECT id, created, session_id, idea, final_response FROM analyses"
+        params = []
+        if session_id:
+            sql += " WHERE session_id = ?"
+            params.append(session_id)
+        sql += " ORDER BY id DESC LIMIT ? OFFSET ?"
+        rows = self._connect().execute(sql, (*params, limit + 1, offset)).fetchall()
+        return self._page(rows, offset, limit)
+
+    @staticmethod
+    def _window_start(conn, query):
+        """Rowid of the SEARCH_WINDOW-th newest match, or 0 if there are fewer.
+
+        Walking matches in rowid order is cheap; scoring them is what costs.
+        """
+        row = conn.execute(
+            "SELECT rowid FROM analyses_fts WHERE analyses_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            (query, SEARCH_WINDOW),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def search(self, text, offset=0, limit=20):
+        """Analyses matching every word, with a highlighted snippet of the best column.
+
+        The newest SEARCH_WINDOW matches come first, best first (BM25), then
+        older matches newest first; queries with a common word are newest
+        first throughout.
+        """
+        terms = fts_terms(text)
+        if not terms:
+            return self._page([], offset, limit)
+        conn = self._connect()
+        query = " ".join(terms)
+        newest = conn.execute("SELECT coalesce(max(id), 0) FROM analyses").fetchone()[0]
+
+        def common(term):
+            # How densely the newest matches are packed estimates the term's share.
+            start = self._window_start(conn, term)
+            return start > 0 and SEARCH_WINDOW > COMMON_SHARE * (newest - start)
+
+        select = ("SELECT a.id, a.created, a.session_id, a.idea, a.final_response, hit.snippet FROM ("
+                  "  SELECT rowid, {} snippet(analyses_fts, -1, '[', ']', '…', 16) AS snippet"
+                  "  FROM analyses_fts WHERE analyses_fts MATCH ? {}"
+                  ") hit JOIN analyses a ON a.id = hit.rowid ")
+        # Selecting rank here would compute BM25 over every match.
+        by_recency = select.format("", "AND rowid <= ? ORDER BY rowid DESC LIMIT ? OFFSET ?") + "ORDER BY a.id DESC"
+        if any(common(term) for term in terms):
+            return self._page(conn.execute(by_recency, (query, newest, limit + 1, offset)).fetchall(), offset, limit)
+
+        start = self._window_start(conn, query)
+        rows = []
+        if not start or offset < SEARCH_WINDOW:
+            # ORDER BY rank lets FTS5 keep only the top rows, so snippets are built for one page.
+            ranked = select.format("rank,", "AND rowid > ? ORDER BY rank LIMIT ? OFFSET ?") + "ORDER BY hit.rank"
+            rows = conn.execute(ranked, (query, start, limit + 1, offset)).fetchall()
+        if start and len(rows) <= limit:
+            # Paging past the ranked window continues with older matches.
+            older = (query, start, limit + 1 - len(rows), max(0, offset - SEARCH_WINDOW))
+            rows += conn.execute(by_recency, older).fetchall()
+        return self._page(rows, offset, limit)
+
+    def _page(self, rows, offset, limit):
+        return {
+            "offset": offset,
+            "results": [self._summary(row) for row in rows[:limit]],
+            "next_offset": offset + limit if len(rows) > limit else None,
+        }
+
+    def get(self, analysis_id):
+        """The full archived analysis, or None."""
+        row = self._connect().execute("SELECT * FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        if row is None:
+            return None
+        analysis = dict(row)
+        analysis["metadata"] = json.loads(analysis["metadata"]) if analysis["metadata"] else {}
+        return analysis
+
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_archive():
+    """Return the process-wide archive, or None if archiving is off."""
+    global _archive
+    if not ARCHIVE_ENABLED:
+        return None
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                _archive = AnalysisArchive()
+                # Don't lose what is still queued when the CLI exits.
+                atexit.register(_archive.close)
+    return _archive
+
+def archive_analysis(record, session_id=None, **metadata):
+    """Queue a finished analysis for the archive (no-op when archiving is off)."""
+    archive = get_archive()
+    if archive is not None:
+        archive.submit(record, session_id=session_id, **metadata)
+
+def close_archive():
+    """Write everything queued and stop the writer thread (on API shutdown)."""
+    global _archive
+    with _archive_lock:
+        archive, _archive = _archive, None
+    if archive is not None:
+        atexit.unregister(archive.close)
+        archive.close()
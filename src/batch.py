@@ -0,0 +1,235 @@
+"""Batch analysis: run many ideas through research/optimist/devil/composer.
+
+Used both from the command line and by the /analyze/batch API endpoint.
+There is no intent classification or conversational delivery; every input is
+treated as an idea.
+
+    python main.py batch ideas.jsonl -o results.jsonl --concurrency 8 --rate 2
+
+Input is JSONL ({"idea": ..., "id": ...}), CSV (an "idea" column and an
+optional "id" column) or plain text with one idea per line; "-" reads stdin.
+Results are appended to the output JSONL as each idea finishes, and a rerun
+with the same output file skips ideas that already completed.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import sys
+import time
+import uuid
+from collections import OrderedDict
+
+from src.archive import archive_analysis
+from src.config import BATCH_CONCURRENCY, BATCH_RATE, BATCH_MAX_JOBS
+
+def idea_id(idea):
+    """Stable ID for ideas without one, so resumes match across runs."""
+    return hashlib.sha1(idea.strip().encode("utf-8")).hexdigest()[:16]
+
+def normalize_item(item):
+    """Turn a str or {"idea", "id"} dict into an {"id", "idea"} dict."""
+    if isinstance(item, str):
+        item = {"idea": item}
+    idea = item.get("idea")
+    idea = "" if idea is None else str(idea).strip()
+    # An explicit id of 0 is still an id
+    item_id = item.get("id")
+    return {"id": idea_id(idea) if item_id is None else str(item_id), "idea": idea}
+
+def read_ideas(path):
+    """Yield {"id", "idea"} dicts from a JSONL, CSV or text file (or "-" for stdin)."""
+    handle = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(handle):
+                # Short rows have None for missing columns
+                if (row.get("idea") or "").strip():
+                    yield normalize_item(row)
+            return
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line) if line.startswith("{") else line
+            item = normalize_item(item)
+            if item["idea"]:
+                yield item
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+def completed_ids(output_path):
+    """IDs already analysed successfully in an earlier (possibly crashed) run."""
+    done = set()
+    try:
+        with open(output_path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line.
+                    continue
+                if "error" not in record:
+                    done.add(record["id"])
+    except FileNotFoundError:
+        pass
+    return done
+
+class RateLimiter:
+    """Spaces out starts to at most `rate` per second (0 disables)."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def analyze_idea(idea):
+    """Research -> (optimist || devil) -> composer for a single idea."""
+    from src.agents.research import run_research_agent_async
+    from src.agents.optimist import run_optimist_agent_async
+    from src.agents.devil import run_devil_agent_async
+    from src.agents.composer import run_composer_agent_async
+    research = await run_research_agent_async(idea)
+    positives, flaws = await asyncio.gather(
+        run_optimist_agent_async(idea, research),
+        run_devil_agent_async(idea, research),
+    )
+    final_response = await run_composer_agent_async(idea, research, positives, flaws)
+    return {
+        "research": research,
+        "positives": positives,
+        "flaws": flaws,
+        "final_response": final_response,
+    }
+
+async def run_ideas(items, on_result, concurrency=BATCH_CONCURRENCY, rate=BATCH_RATE):
+    """Analyse items with bounded concurrency, calling on_result(record) as each finishes.
+
+    Failures, and empty ideas (which are not sent to the model), are
+    reported as records with an "error" key instead of aborting the batch.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+
+    async def one(item):
+        if not item["idea"]:
+            on_result({**item, "error": "empty idea", "seconds": 0.0})
+            return
+        async with semaphore:
+            await limiter.wait()
+            start = time.perf_counter()
+            try:
+                record = {**item, **await analyze_idea(item["idea"])}
+            except Exception as e:
+                record = {**item, "error": str(e)}
+            record["seconds"] = round(time.perf_counter() - start, 3)
+            if "error" not in record:
+                archive_analysis(record, source="batch", batch_id=item["id"], seconds=record["seconds"])
+            on_result(record)
+
+    await asyncio.gather(*(one(item) for item in items))
+
+async def run_file(input_path, output_path, concurrency=BATCH_CONCURRENCY, rate=BATCH_RATE):
+    """Analyse every idea in input_path not yet in output_path, appending results."""
+    done = completed_ids(output_path)
+    seen = set()
+    pending = []
+    for item in read_ideas(input_path):
+        if item["id"] not in done and item["id"] not in seen:
+            seen.add(item["id"])
+            pending.append(item)
+    print(f"📦 {len(pending)} ideas to analyse ({len(done)} already done)", file=sys.stderr)
+
+    counts = {"ok": 0, "failed": 0}
+    with open(output_path, "a", encoding="utf-8") as output:
+        def write(record):
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            counts["failed" if "error" in record else "ok"] += 1
+            print(f"  [{counts['ok'] + counts['failed']}/{len(pending)}] {record['id']}"
+                  + (f" ❌ {record['error']}" if "error" in record else ""), file=sys.stderr)
+
+        await run_ideas(pending, write, concurrency=concurrency, rate=rate)
+    return counts
+
+class BatchJob:
+    """An in-process batch run whose results can be paged while it runs."""
+
+    def __init__(self, items, concurrency=BATCH_CONCURRENCY, rate=BATCH_RATE):
+        self.id = uuid.uuid4().hex
+        self.items = [normalize_item(item) for item in items]
+        self.concurrency = concurrency
+        self.rate = rate
+        self.results = []
+        self.status = "pending"
+        self.created = time.time()
+        self.task = None
+
+    async def run(self):
+        self.status = "running"
+        try:
+            await run_ideas(self.items, self.results.append, self.concurrency, self.rate)
+            self.status = "completed"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+
+    def page(self, offset=0, limit=50):
+        failed = sum(1 for record in self.results if "error" in record)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": len(self.items),
+            "completed": len(self.results) - failed,
+            "failed": failed,
+            "offset": offset,
+            "results": self.results[offset:offset + limit],
+        }
+
+class BatchJobs:
+    """Registry of recent batch jobs; the oldest finished jobs are dropped."""
+
+    def __init__(self, max_jobs=BATCH_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+
+    def submit(self, items, concurrency=BATCH_CONCURRENCY, rate=BATCH_RATE):
+        job = BatchJob(items, concurrency, rate)
+        job.task = asyncio.create_task(job.run())
+        self._jobs[job.id] = job
+        for old_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[old_id].task.done():
+                del self._jobs[old_id]
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Analyse many ideas at once.")
+    parser.add_argument("input", help="JSONL, CSV or text file of ideas, or - for stdin")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Ideas analysed at once")
+    parser.add_argument("--rate", type=float, default=BATCH_RATE, help="Max ideas started per second (0 = unlimited)")
+    args = parser.parse_args(argv)
+
+    counts = asyncio.run(run_file(args.input, args.output, args.concurrency, args.rate))
+    print(f"✅ {counts['ok']} analysed, {counts['failed']} failed → {args.output}", file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(cli())
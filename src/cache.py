@@ -0,0 +1,181 @@
+"""Content-addressed cache for agent outputs.
+
+Responses are keyed on a hash of (agent, model, messages, generation params),
+so a repeat analysis of the same idea skips the model entirely. Lookups hit an
+in-memory LRU first and then a SQLite tier that survives restarts; both tiers
+expire entries after CACHE_TTL and are bounded in size.
+"""
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from src.config import (
+    CACHE_ENABLED,
+    CACHE_DB_PATH,
+    CACHE_TTL,
+    CACHE_MEMORY_ENTRIES,
+    CACHE_DISK_ENTRIES,
+)
+
+# Agents whose prompts depend only on the idea and upstream outputs. The
+# conversational agents read session history and are never cached.
+CACHEABLE_AGENTS = {"router", "research", "optimist", "devil", "composer"}
+
+_bypass = contextvars.ContextVar("cache_bypass", default=False)
+
+@contextmanager
+def bypass_cache(enabled=True):
+    """Skip cache reads and writes for calls made inside this block."""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+def cache_bypassed():
+    """True inside a bypass_cache() block."""
+    return _bypass.get()
+
+def cache_key(agent, model, messages, params=None):
+    payload = json.dumps(
+        {"agent": agent, "model": model, "messages": messages, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) response cache with hit/miss counters."""
+
+    # Disk size limit is enforced every this many writes.
+    PRUNE_EVERY = 200
+
+    def __init__(self, path=CACHE_DB_PATH, ttl=CACHE_TTL,
+                 memory_entries=CACHE_MEMORY_ENTRIES, disk_entries=CACHE_DISK_ENTRIES):
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+            self._conn.commit()
+
+    def get_memory(self, key):
+        """Memory-tier lookup only; cheap enough to call from the event loop."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, created = entry
+            if time.time() - created > self.ttl:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            return value
+
+    def get(self, key):
+        """Look up a response in memory, then on disk. Returns None on a miss."""
+        value = self.get_memory(key)
+        if value is not None:
+            return value
+
+        row = None
+        if self._conn is not None:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._stats["disk_hits"] += 1
+            self._remember(key, row[0], row[1])
+        return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["writes"] += 1
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                (key, value, now),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            self._conn.commit()
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _prune(self, now):
+        cursor = self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        evicted = cursor.rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.disk_entries:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY created LIMIT ?)",
+                (count - self.disk_entries,),
+            )
+            evicted += cursor.rowcount
+        self._stats["evictions"] += evicted
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide cache, or None if caching is off for this call."""
+    global _cache
+    if not CACHE_ENABLED or _bypass.get():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+def cache_stats():
+    return _cache.stats() if _cache is not None else {}
@@ -0,0 +1,164 @@
+"""Process-wide, pooled Cerebras clients.
+
+One sync client is shared by every thread and one async client is kept per event
+loop. Both sit on a keep-alive httpx pool with a bounded size and a per-host cap
+on in-flight requests, so agent calls reuse warm TLS connections instead of
+opening a new one each time.
+"""
+import asyncio
+import os
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.config import (
+    get_api_key,
+    GATEWAY_ENABLED,
+    LLM_BACKEND,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_MAX_PER_HOST,
+    LLM_TIMEOUT,
+    LLM_CONNECT_TIMEOUT,
+)
+
+class HostLimitedTransport(httpx.HTTPTransport):
+    """HTTP transport that caps concurrent requests per host."""
+
+    def __init__(self, max_per_host=LLM_MAX_PER_HOST, **kwargs):
+        super().__init__(**kwargs)
+        self.max_per_host = max_per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def handle_request(self, request):
+        with self._semaphore(request.url.host):
+            return super().handle_request(request)
+
+class AsyncHostLimitedTransport(httpx.AsyncHTTPTransport):
+    """Async HTTP transport that caps concurrent requests per host."""
+
+    def __init__(self, max_per_host=LLM_MAX_PER_HOST, **kwargs):
+        super().__init__(**kwargs)
+        self.max_per_host = max_per_host
+        self._semaphores = {}
+
+    async def handle_async_request(self, request):
+        host = request.url.host
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        async with self._semaphores[host]:
+            return await super().handle_async_request(request)
+
+def _limits():
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+def _timeout():
+    return httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+def _transport():
+    """The sync transport for LLM_BACKEND (see src/replay.py)."""
+    from src.replay import RecordingTransport, ReplayTransport, get_recorder, get_replayer
+    if LLM_BACKEND == "replay":
+        return ReplayTransport(get_replayer())
+    transport = HostLimitedTransport(limits=_limits())
+    if LLM_BACKEND == "record":
+        transport = RecordingTransport(transport, get_recorder())
+    return transport
+
+def _async_transport():
+    """The async transport for LLM_BACKEND (see src/replay.py)."""
+    from src.replay import AsyncRecordingTransport, AsyncReplayTransport, get_recorder, get_replayer
+    if LLM_BACKEND == "replay":
+        return AsyncReplayTransport(get_replayer())
+    transport = AsyncHostLimitedTransport(limits=_limits())
+    if LLM_BACKEND == "record":
+        transport = AsyncRecordingTransport(transport, get_recorder())
+    return transport
+
+def _api_key():
+    # Replay never reaches the API, so it needs no key.
+    if LLM_BACKEND == "replay":
+        return os.environ.get("CEREBRAS_API_KEY") or "replay"
+    return get_api_key()
+
+# src/gateway.py owns retries; the SDK's own retries would multiply them.
+MAX_RETRIES = 0 if GATEWAY_ENABLED else 2
+
+_lock = threading.Lock()
+_client = None
+_async_clients = {}
+
+def get_shared_client():
+    """Return the process-wide sync client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                # The SDK is only imported once a client is needed, which keeps API workers quick to start
+                from cerebras.cloud.sdk import Cerebras
+                http_client = httpx.Client(transport=_transport(), timeout=_timeout())
+                _client = Cerebras(api_key=_api_key(), http_client=http_client, max_retries=MAX_RETRIES)
+    return _client
+
+def get_shared_async_client():
+    """Return the async client bound to the running event loop."""
+    # httpx async pools cannot be shared across event loops, so keep one per loop.
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from cerebras.cloud.sdk import AsyncCerebras
+        http_client = httpx.AsyncClient(transport=_async_transport(), timeout=_timeout())
+        # The TCP warm-up request is synchronous, so skip it inside the event loop.
+        client = AsyncCerebras(
+            api_key=_api_key(),
+            http_client=http_client,
+            max_retries=MAX_RETRIES,
+            warm_tcp_connection=False,
+        )
+        with _lock:
+            for stale in [l for l in _async_clients if l.is_closed()]:
+                del _async_clients[stale]
+            _async_clients[loop] = client
+    return client
+
+def close_clients():
+    """Close the sync client; async clients are closed with aclose_clients()."""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+async def aclose_clients():
+    """Close the client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.close()
+
+def describe_pool():
+    """Return the pool settings, mainly for logging and benchmarks."""
+    return {
+        "max_connections": LLM_MAX_CONNECTIONS,
+        "max_keepalive": LLM_MAX_KEEPALIVE,
+        "keepalive_expiry": LLM_KEEPALIVE_EXPIRY,
+        "max_per_host": LLM_MAX_PER_HOST,
+        "timeout": LLM_TIMEOUT,
+        "connect_timeout": LLM_CONNECT_TIMEOUT,
+        "backend": LLM_BACKEND,
+        "base_url": urlsplit(str(get_shared_client().base_url)).netloc,
+    }
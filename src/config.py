@@ -1,18 +1,152 @@
+import json
 import os
-from cerebras.cloud.sdk import Cerebras
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-def get_client():
-    """Initialize and return the Cerebras client."""
+def get_api_key():
+    """Return the Cerebras API key from the environment."""
     api_key = os.environ.get("CEREBRAS_API_KEY")
     if not api_key:
         raise EnvironmentError(
             "CEREBRAS_API_KEY not set. Please check your .env file."
         )
-    return Cerebras(api_key=api_key)
+    return api_key
+
+def get_client():
+    """Return the shared, pooled Cerebras client."""
+    from src.clients import get_shared_client
+    return get_shared_client()
+
+def get_async_client():
+    """Return the pooled async Cerebras client for the running event loop."""
+    from src.clients import get_shared_async_client
+    return get_shared_async_client()
 
 # Default model to use
-DEFAULT_MODEL = "llama-3.3-70b"
+DEFAULT_MODEL = os.environ.get("DEFAULT_MODEL", "llama-3.3-70b")
+# Small, fast model for casual chat
+FAST_MODEL = os.environ.get("FAST_MODEL", "llama3.1-8b")
+
+# Per-agent model and generation parameters. max_tokens follows each prompt's
+# word budget (roughly 1.5 tokens per word plus Markdown overhead); timeout
+# bounds a single attempt before the fallback chain takes over.
+# The router stays on DEFAULT_MODEL until benchmarks/eval_router.py shows
+# FAST_MODEL agreeing with it on the labelled prompts.
+AGENT_MODELS = {
+    "router": {"model": DEFAULT_MODEL, "max_tokens": 8, "temperature": 0, "timeout": 10},
+    "chat": {"model": FAST_MODEL, "max_tokens": 200, "timeout": 20},
+    "research": {"model": DEFAULT_MODEL, "max_tokens": 320},
+    "optimist": {"model": DEFAULT_MODEL, "max_tokens": 320},
+    "devil": {"model": DEFAULT_MODEL, "max_tokens": 320},
+    "composer": {"model": DEFAULT_MODEL, "max_tokens": 420},
+    "conversational": {"model": DEFAULT_MODEL, "max_tokens": 600},
+}
+
+# Models tried in order when a model errors out or times out.
+FALLBACK_MODELS = {
+    FAST_MODEL: [DEFAULT_MODEL],
+    DEFAULT_MODEL: [],
+}
+
+# Optional JSON overrides, e.g. AGENT_MODELS_JSON='{"chat": {"model": "llama-3.3-70b"}}'
+for _agent, _overrides in json.loads(os.environ.get("AGENT_MODELS_JSON", "{}")).items():
+    AGENT_MODELS.setdefault(_agent, {}).update(_overrides)
+
+def get_agent_config(agent):
+    """Return (model chain, generation params, per-attempt timeout) for an agent."""
+    config = dict(AGENT_MODELS.get(agent) or {})
+    model = config.pop("model", DEFAULT_MODEL)
+    timeout = config.pop("timeout", None)
+    chain = [model] + [m for m in FALLBACK_MODELS.get(model, []) if m != model]
+    return chain, config, timeout
+
+# LLM backend behind get_client() (see src/replay.py): "live", "record" (live,
+# appending every call to LLM_RECORDING) or "replay" (served in-process from
+# LLM_RECORDING with simulated latency, token rate and errors; no network)
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "live")
+LLM_RECORDING = os.environ.get("LLM_RECORDING", "llm_recording.jsonl")
+REPLAY_TTFT_MS = float(os.environ.get("REPLAY_TTFT_MS", 200))  # median time to first token
+REPLAY_TTFT_P99_MS = float(os.environ.get("REPLAY_TTFT_P99_MS", 600))  # lognormal tail
+REPLAY_TOKENS_PER_S = float(os.environ.get("REPLAY_TOKENS_PER_S", 1000))  # 0 = whole reply at once
+REPLAY_ERROR_RATE = float(os.environ.get("REPLAY_ERROR_RATE", 0))  # fraction answered with 503
+REPLAY_SEED = int(os.environ.get("REPLAY_SEED", 0))
+
+# Connection pool for LLM calls (see src/clients.py)
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 100))
+LLM_MAX_KEEPALIVE = int(os.environ.get("LLM_MAX_KEEPALIVE", 32))
+LLM_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY", 30))
+LLM_MAX_PER_HOST = int(os.environ.get("LLM_MAX_PER_HOST", 32))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 60))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", 5))
+
+# Per-session state (see src/sessions.py)
+SESSION_STORE = os.environ.get("SESSION_STORE", "memory")  # "memory" or "sqlite"
+SESSION_DB_PATH = os.environ.get("SESSION_DB_PATH", "sessions.db")
+SESSION_TTL = float(os.environ.get("SESSION_TTL", 3600))
+SESSION_MAX = int(os.environ.get("SESSION_MAX", 20000))
+
+# Conversational context budget (see src/context.py)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 4000))  # 0 disables trimming
+CONTEXT_KEEP_RECENT = int(os.environ.get("CONTEXT_KEEP_RECENT", 6))
+CONTEXT_SUMMARY_TOKENS = int(os.environ.get("CONTEXT_SUMMARY_TOKENS", 500))
+
+# Agent response cache (see src/cache.py)
+CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "1") == "1"
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", "response_cache.db")  # empty = memory only
+CACHE_TTL = float(os.environ.get("CACHE_TTL", 7 * 24 * 3600))
+CACHE_MEMORY_ENTRIES = int(os.environ.get("CACHE_MEMORY_ENTRIES", 2000))
+CACHE_DISK_ENTRIES = int(os.environ.get("CACHE_DISK_ENTRIES", 200000))
+
+# Semantic near-duplicate cache for whole analyses (see src/semantic_cache.py)
+SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_DIR = os.environ.get("SEMANTIC_CACHE_DIR", "semantic_cache")  # empty = memory only
+SEMANTIC_THRESHOLD = float(os.environ.get("SEMANTIC_THRESHOLD", 0.85))  # cosine similarity to reuse
+SEMANTIC_MAX_ENTRIES = int(os.environ.get("SEMANTIC_MAX_ENTRIES", 100000))  # oldest overwritten first
+SEMANTIC_DIM = int(os.environ.get("SEMANTIC_DIM", 256))
+
+# Analysis scheduling (see src/scheduler.py and MultiAgentSystem.process_user_input_async)
+SPECULATIVE_RESEARCH = os.environ.get("SPECULATIVE_RESEARCH", "1") == "1"  # research while classifying
+CRITIC_PREFIX_CHARS = int(os.environ.get("CRITIC_PREFIX_CHARS", 0))  # >0: critics start on a research prefix
+MERGE_DELIVERY = os.environ.get("MERGE_DELIVERY", "0") == "1"  # one call for composer + delivery
+
+# Batch analysis (see src/batch.py)
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 8))
+BATCH_RATE = float(os.environ.get("BATCH_RATE", 0))  # ideas started per second, 0 = unlimited
+BATCH_MAX_JOBS = int(os.environ.get("BATCH_MAX_JOBS", 100))
+
+# Append-only archive of finished analyses with full-text search (see src/archive.py)
+ARCHIVE_ENABLED = os.environ.get("ARCHIVE_ENABLED", "1") == "1"
+ARCHIVE_DB_PATH = os.environ.get("ARCHIVE_DB_PATH", "analyses.db")
+ARCHIVE_QUEUE_SIZE = int(os.environ.get("ARCHIVE_QUEUE_SIZE", 10000))  # records waiting for the writer
+
+# LLM call gateway: rate limits, retries and load shedding (see src/gateway.py)
+GATEWAY_ENABLED = os.environ.get("GATEWAY_ENABLED", "1") == "1"
+GATEWAY_RPM = float(os.environ.get("GATEWAY_RPM", 0))  # provider requests/minute, 0 = unlimited
+GATEWAY_TPM = float(os.environ.get("GATEWAY_TPM", 0))  # provider tokens/minute, 0 = unlimited
+GATEWAY_MAX_CONCURRENCY = int(os.environ.get("GATEWAY_MAX_CONCURRENCY", 64))
+GATEWAY_MAX_QUEUE = int(os.environ.get("GATEWAY_MAX_QUEUE", 1000))
+GATEWAY_MAX_WAIT = float(os.environ.get("GATEWAY_MAX_WAIT", 30))  # shed calls that would wait longer
+GATEWAY_MAX_RETRIES = int(os.environ.get("GATEWAY_MAX_RETRIES", 4))
+GATEWAY_BACKOFF_BASE = float(os.environ.get("GATEWAY_BACKOFF_BASE", 0.5))
+GATEWAY_BACKOFF_MAX = float(os.environ.get("GATEWAY_BACKOFF_MAX", 20))
+GATEWAY_EXPECTED_COMPLETION_TOKENS = int(os.environ.get("GATEWAY_EXPECTED_COMPLETION_TOKENS", 300))
+
+# Tracing (see src/metrics.py); metrics are always on at /metrics
+TRACE_EXPORT = os.environ.get("TRACE_EXPORT", "")  # "", "file" or "otlp"
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+OTLP_ENDPOINT = os.environ.get("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+
+# Frontend served by the API (see src/static.py)
+FRONTEND_DIR = os.environ.get("FRONTEND_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend"))
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", 365 * 24 * 3600))  # browser cache for versioned assets
+
+# Production server (see src/launcher.py, `python main.py serve`)
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", 8001))
+# One by default: batch jobs live in the worker that started them, so with
+# more, GET /analyze/batch/{job_id} can land on a worker that returns 404.
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 1))
+SERVER_KEEPALIVE = float(os.environ.get("SERVER_KEEPALIVE", 75))  # idle seconds before a keep-alive connection closes
+SERVER_GRACEFUL_TIMEOUT = float(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))  # in-flight requests get this long on shutdown
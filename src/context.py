@@ -0,0 +1,96 @@
+"""Token budgeting for the conversational history.
+
+The history sent to the conversational agent is kept under
+CONTEXT_TOKEN_BUDGET: the system prompt and the most recent turns stay
+verbatim, while older turns are folded into a rolling summary message that
+lives in the history itself (so it is only computed once per folded turn).
+Tokens are estimated locally, no tokenizer download or network call needed.
+"""
+import re
+
+from src.config import CONTEXT_TOKEN_BUDGET, CONTEXT_KEEP_RECENT, CONTEXT_SUMMARY_TOKENS
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+# Per-message overhead for role and separators in chat templates.
+MESSAGE_OVERHEAD = 4
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+# BPE vocabularies hold most English words whole, so a word is one token
+# up to this length and one more per WORD_CHARS_PER_TOKEN characters after it.
+WORD_TOKEN_CHARS = 9
+WORD_CHARS_PER_TOKEN = 4
+
+def count_tokens(text):
+    """Estimate the number of BPE tokens in text.
+
+    Punctuation counts as one token each. On English prose this is within
+    about 5% of GPT-2's tokenizer and a little above Llama 3's, whose larger
+    vocabulary needs fewer tokens, so budgets err on the safe side. Code and
+    digit runs are undercounted.
+    """
+    return sum(
+        1 + max(0, len(piece) - WORD_TOKEN_CHARS + WORD_CHARS_PER_TOKEN - 1) // WORD_CHARS_PER_TOKEN
+        if piece[0].isalnum() or piece[0] == "_" else 1
+        for piece in _TOKEN_RE.findall(text)
+    )
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+def history_tokens(messages):
+    return sum(message_tokens(message) for message in messages)
+
+def is_summary(message):
+    return message["role"] == "system" and message["content"].startswith(SUMMARY_PREFIX)
+
+def summarize_message(message, max_words=30):
+    """Extractive one-line summary: the first sentence, trimmed."""
+    text = " ".join(message["content"].split())
+    first = _SENTENCE_RE.split(text, maxsplit=1)[0]
+    words = first.split()
+    if len(words) > max_words:
+        first = " ".join(words[:max_words]) + "..."
+    speaker = "User" if message["role"] == "user" else "Assistant"
+    return f"- {speaker}: {first}"
+
+def _trim_summary(lines, max_tokens):
+    # Drop the oldest lines first; the newest context matters most.
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return lines
+
+def fit_history(history, budget=None, keep_recent=None):
+    """Fold old turns into the rolling summary until history fits the budget.
+
+    Mutates history in place. history[0] is the system prompt and is never
+    touched, nor are the last keep_recent messages. Returns history.
+    """
+    budget = budget if budget is not None else CONTEXT_TOKEN_BUDGET
+    keep_recent = keep_recent if keep_recent is not None else CONTEXT_KEEP_RECENT
+    if not budget or history_tokens(history) <= budget:
+        return history
+
+    start = 1
+    lines = []
+    if len(history) > 1 and is_summary(history[1]):
+        lines = history[1]["content"].split("\n")[1:]
+        start = 2
+
+    folded = 0
+    total = history_tokens(history)
+    while total > budget and len(history) - (start + folded) > keep_recent:
+        message = history[start + folded]
+        lines.append(summarize_message(message))
+        total -= message_tokens(message)
+        folded += 1
+
+    if not folded:
+        return history
+
+    lines = _trim_summary(lines, CONTEXT_SUMMARY_TOKENS)
+    summary = {"role": "system", "content": "\n".join([SUMMARY_PREFIX] + lines)}
+    history[1:start + folded] = [summary]
+    return history
@@ -0,0 +1,281 @@
+"""Central gateway for every LLM call.
+
+All agent calls pass through here (via src/llm.py) so the process as a whole
+stays within the provider's limits:
+
+- token buckets for requests per minute and tokens per minute; the request
+  rate backs off when the provider answers 429 and recovers on success,
+- a cap on in-flight calls with a bounded wait queue (a streamed call is in
+  flight until its stream has been read or closed, see aslot()),
+- load shedding: when the queue is full, or the rate limiter would make a
+  call wait longer than GATEWAY_MAX_WAIT, Overloaded is raised at once so
+  the API can answer 503 with Retry-After,
+- retries with jittered exponential backoff on 429, 5xx, timeouts and
+  connection errors, honouring the provider's Retry-After header.
+"""
+import asyncio
+import contextlib
+import random
+import threading
+import time
+
+from src.config import (
+    GATEWAY_ENABLED,
+    GATEWAY_RPM,
+    GATEWAY_TPM,
+    GATEWAY_MAX_CONCURRENCY,
+    GATEWAY_MAX_QUEUE,
+    GATEWAY_MAX_WAIT,
+    GATEWAY_MAX_RETRIES,
+    GATEWAY_BACKOFF_BASE,
+    GATEWAY_BACKOFF_MAX,
+    GATEWAY_EXPECTED_COMPLETION_TOKENS,
+)
+from src.context import history_tokens
+from src.metrics import LLM_QUEUE_SECONDS, annotate
+
+class Overloaded(Exception):
+    """The gateway is saturated; the caller should retry after retry_after seconds."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Reservation-based token bucket, safe to share between threads and event loops.
+
+    reserve() takes the tokens immediately (the balance may go negative) and
+    returns how long the caller must wait before using them.
+    """
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60
+        self.max_rate = self.rate
+        # Allow about one second of burst; providers usually enforce limits over short windows.
+        self.capacity = max(1.0, per_minute / 60) if per_minute else 0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount, max_wait=None):
+        """Reserve amount tokens; returns the wait in seconds, or None if it exceeds max_wait."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (amount - self.tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= amount
+            return wait
+
+    def throttle(self, factor=0.5, floor=0.1):
+        """Multiplicative decrease after the provider pushed back."""
+        with self._lock:
+            self.rate = max(self.max_rate * floor, self.rate * factor)
+
+    def recover(self, step=0.05):
+        """Additive increase back towards the configured rate."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * step)
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def _is_retryable(error):
+    from cerebras.cloud.sdk import APIConnectionError, APIStatusError
+    if isinstance(error, APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+def _backoff(attempt, error):
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(GATEWAY_BACKOFF_MAX, GATEWAY_BACKOFF_BASE * 2 ** attempt))
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, GATEWAY_BACKOFF_MAX))
+    return delay
+
+class Gateway:
+    def __init__(self):
+        self.requests = TokenBucket(GATEWAY_RPM)
+        self.tokens = TokenBucket(GATEWAY_TPM)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._sync_slots = threading.BoundedSemaphore(GATEWAY_MAX_CONCURRENCY)
+        self._async_slots = {}
+        self.stats = {"calls": 0, "retries": 0, "shed": 0, "throttled": 0, "failures": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _enter_queue(self):
+        with self._lock:
+            # Only calls that cannot get a slot right away count against the queue.
+            if self._in_flight + self._waiting >= GATEWAY_MAX_CONCURRENCY + GATEWAY_MAX_QUEUE:
+                self.stats["shed"] += 1
+                raise Overloaded("LLM call queue is full", retry_after=GATEWAY_MAX_WAIT or 1.0)
+            self._waiting += 1
+
+    def _leave_queue(self, started):
+        with self._lock:
+            self._waiting -= 1
+            if started:
+                self._in_flight += 1
+
+    def _finish(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _reserve(self, messages):
+        """Take a request and the estimated tokens; returns the wait or raises Overloaded."""
+        wait = self.requests.reserve(1, GATEWAY_MAX_WAIT)
+        if wait is None:
+            self._count("shed")
+            raise Overloaded("Request rate limit reached", retry_after=GATEWAY_MAX_WAIT or 1.0)
+        cost = history_tokens(messages) + GATEWAY_EXPECTED_COMPLETION_TOKENS
+        token_wait = self.tokens.reserve(cost, GATEWAY_MAX_WAIT)
+        if token_wait is None:
+            self._count("shed")
+            raise Overloaded("Token rate limit reached", retry_after=GATEWAY_MAX_WAIT or 1.0)
+        return max(wait, token_wait)
+
+    def _on_error(self, error, attempt, retries):
+        """Decide whether to retry; returns the backoff delay or re-raises."""
+        # Imported here so that importing the gateway (e.g. by src.api) does not load the SDK
+        from cerebras.cloud.sdk import RateLimitError
+        if isinstance(error, RateLimitError):
+            self.requests.throttle()
+            self._count("throttled")
+        if not _is_retryable(error) or attempt >= retries:
+            self._count("failures")
+            if isinstance(error, RateLimitError):
+                raise Overloaded("Provider rate limit", retry_after=_retry_after(error) or GATEWAY_BACKOFF_MAX) from error
+            raise error
+        self._count("retries")
+        return _backoff(attempt, error)
+
+    def _queued(self, agent, queued_at):
+        wait = time.monotonic() - queued_at
+        LLM_QUEUE_SECONDS.observe(wait, agent=agent or "unknown")
+        annotate(queue_wait_seconds=round(wait, 6))
+
+    def call(self, messages, send, agent=None, retries=None):
+        """Run send() (a blocking LLM call) under the gateway's limits and retry policy.
+
+        retries overrides GATEWAY_MAX_RETRIES, e.g. 0 when the caller has
+        another model to fall back to.
+        """
+        if not GATEWAY_ENABLED:
+            return send()
+        self._count("calls")
+        queued_at = time.monotonic()
+        self._enter_queue()
+        started = False
+        try:
+            self._sync_slots.acquire()
+            started = True
+        finally:
+            self._leave_queue(started)
+        try:
+            attempt = 0
+            time.sleep(self._reserve(messages))
+            self._queued(agent, queued_at)
+            while True:
+                try:
+                    result = send()
+                    self.requests.recover()
+                    return result
+                except Exception as e:
+                    time.sleep(self._on_error(e, attempt, GATEWAY_MAX_RETRIES if retries is None else retries))
+                    attempt += 1
+                    time.sleep(self._reserve(messages))
+        finally:
+            self._finish()
+            self._sync_slots.release()
+
+    def _async_semaphore(self):
+        # asyncio primitives belong to one event loop, so keep one per loop.
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_slots.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(GATEWAY_MAX_CONCURRENCY)
+            with self._lock:
+                for stale in [l for l in self._async_slots if l.is_closed()]:
+                    del self._async_slots[stale]
+                self._async_slots[loop] = semaphore
+        return semaphore
+
+    async def acall(self, messages, send, agent=None, retries=None):
+        """Async variant of call(); send is a coroutine function."""
+        async with self.aslot(messages, send, agent=agent, retries=retries) as result:
+            return result
+
+    @contextlib.asynccontextmanager
+    async def aslot(self, messages, send, agent=None, retries=None):
+        """Like acall(), but the call stays in flight until the block exits.
+
+        For streams, send() returns as soon as the stream is open, so the
+        stream is read inside the block:
+
+            async with gateway.aslot(messages, open_stream) as stream:
+                async for chunk in stream: ...
+        """
+        if not GATEWAY_ENABLED:
+            yield await send()
+            return
+        self._count("calls")
+        queued_at = time.monotonic()
+        semaphore = self._async_semaphore()
+        self._enter_queue()
+        started = False
+        try:
+            await semaphore.acquire()
+            started = True
+        finally:
+            self._leave_queue(started)
+        try:
+            attempt = 0
+            await asyncio.sleep(self._reserve(messages))
+            self._queued(agent, queued_at)
+            while True:
+                try:
+                    result = await send()
+                    self.requests.recover()
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await asyncio.sleep(self._on_error(e, attempt, GATEWAY_MAX_RETRIES if retries is None else retries))
+                    attempt += 1
+                    await asyncio.sleep(self._reserve(messages))
+            # Outside the retry loop: errors raised in the block are not retried.
+            yield result
+        finally:
+            self._finish()
+            semaphore.release()
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update(in_flight=self._in_flight, waiting=self._waiting)
+        stats["request_rate_per_min"] = round(self.requests.rate * 60, 1)
+        return stats
+
+gateway = Gateway()
@@ -0,0 +1,87 @@
+"""Production server: several uvicorn worker processes on one port.
+
+    python main.py serve --workers 4 --port 8001
+
+uvicorn's supervisor restarts workers that die. Each worker keeps idle
+connections open for SERVER_KEEPALIVE seconds. On SIGINT/SIGTERM, workers
+stop accepting connections and give in-flight requests up to
+SERVER_GRACEFUL_TIMEOUT seconds, then the shutdown hooks close the LLM
+clients and flush the archive. src.api does not load the agents, the SDK or
+numpy when imported, and the LLM client is created on first use, so a worker
+is up as soon as FastAPI is.
+
+Some state lives in process memory, so with more than one worker sessions
+move to SQLite and the gateway's RPM/TPM budgets are divided between workers.
+Batch jobs stay in the worker that started them, which is why the default
+is a single worker.
+"""
+import argparse
+import os
+import sys
+
+import uvicorn
+
+from src.config import (
+    GATEWAY_RPM,
+    GATEWAY_TPM,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_HOST,
+    SERVER_KEEPALIVE,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SESSION_STORE,
+)
+
+def worker_environment(workers):
+    """Settings that have to change so per-process state still adds up across workers."""
+    env = {}
+    if workers > 1:
+        # A follow-up request may land on another worker
+        if SESSION_STORE == "memory":
+            env["SESSION_STORE"] = "sqlite"
+        # Each worker has its own token buckets
+        if GATEWAY_RPM:
+            env["GATEWAY_RPM"] = str(GATEWAY_RPM / workers)
+        if GATEWAY_TPM:
+            env["GATEWAY_TPM"] = str(GATEWAY_TPM / workers)
+    return env
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Run the API and web UI with several workers.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="Worker processes")
+    parser.add_argument("--keep-alive", type=float, default=SERVER_KEEPALIVE, help="Idle keep-alive seconds")
+    parser.add_argument("--graceful-timeout", type=float, default=SERVER_GRACEFUL_TIMEOUT,
+                        help="Seconds in-flight requests get to finish on shutdown")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    workers = max(1, args.workers)
+
+    # Worker processes inherit the environment and read their settings from it
+    env = worker_environment(workers)
+    for name, value in env.items():
+        print(f"⚙️  {name}={value} with {workers} workers", file=sys.stderr)
+    if workers > 1:
+        print("⚠️  Batch jobs are kept by the worker that started them; "
+              "GET /analyze/batch/{job_id} can 404 on the others", file=sys.stderr)
+    os.environ.update(env)
+
+    # Compress the frontend once here rather than in every worker
+    from src.static import precompress
+    precompress()
+
+    print(f"🚀 Serving on http://{args.host}:{args.port} with {workers} worker(s)", file=sys.stderr)
+    uvicorn.run(
+        "src.api:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,166 @@
+import asyncio
+
+from cerebras.cloud.sdk import APIConnectionError, APIStatusError, RateLimitError
+
+from src.cache import get_cache, cache_key, CACHEABLE_AGENTS
+from src.config import get_client, get_async_client, get_agent_config, LLM_BACKEND
+from src.context import count_tokens, history_tokens
+from src.gateway import gateway, Overloaded
+from src.metrics import llm_call, record_cache_lookup
+from src.replay import AGENT_HEADER
+
+# Every agent goes through these helpers so the sync and async pipelines
+# build identical requests and only differ in how they wait for the model.
+# Passing agent= names the caller and selects its model, generation params
+# and fallback chain from AGENT_MODELS in src/config.py; calls from
+# CACHEABLE_AGENTS go through the response cache. Every model call goes
+# through the gateway (rate limits, retries, load shedding) and is recorded
+# by src/metrics.py.
+
+def _plan(agent, model):
+    """Models to try, generation params and per-attempt timeout."""
+    chain, params, timeout = get_agent_config(agent)
+    if model is not None:
+        chain = [model]
+    return chain, params, timeout
+
+def _should_fall_back(error):
+    """Provider-side failures move on to the next model; local overload does not."""
+    if isinstance(error, Overloaded):
+        return isinstance(error.__cause__, RateLimitError)
+    if isinstance(error, APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (404, 429) or error.status_code >= 500
+    return False
+
+def _cache_for(agent, messages, model, params):
+    cache = get_cache() if agent in CACHEABLE_AGENTS else None
+    if cache is None:
+        return None, None
+    return cache, cache_key(agent, model, messages, params)
+
+def _record_usage(call, usage, messages, content):
+    # Fall back to the local estimate when the provider sends no usage block.
+    if usage is not None:
+        call.tokens(usage.prompt_tokens, usage.completion_tokens)
+    else:
+        call.tokens(history_tokens(messages), count_tokens(content))
+
+def _retries(chain, index):
+    """Only the last model in the chain is retried; the others fall back on the first failure."""
+    return None if index == len(chain) - 1 else 0
+
+def _request(messages, model, params, timeout, agent=None, **extra):
+    request = dict(messages=messages, model=model, **params, **extra)
+    if timeout is not None:
+        request["timeout"] = timeout
+    # Lets the record/replay backends tell the agents apart.
+    if agent and LLM_BACKEND != "live":
+        request["extra_headers"] = {AGENT_HEADER: agent}
+    return request
+
+def complete(messages, model=None, agent=None):
+    """Run a chat completion and return the reply text."""
+    chain, params, timeout = _plan(agent, model)
+    cache, key = _cache_for(agent, messages, chain[0], params)
+    if cache is not None:
+        cached = cache.get(key)
+        record_cache_lookup(agent, cached is not None)
+        if cached is not None:
+            return cached
+
+    client = get_client()
+    for index, attempt_model in enumerate(chain):
+        request = _request(messages, attempt_model, params, timeout, agent)
+        try:
+            with llm_call(agent, attempt_model) as call:
+                response = gateway.call(
+                    messages, lambda: client.chat.completions.create(**request), agent=agent, retries=_retries(chain, index)
+                )
+                content = response.choices[0].message.content
+                _record_usage(call, response.usage, messages, content)
+        except Exception as e:
+            if index == len(chain) - 1 or not _should_fall_back(e):
+                raise
+            continue
+        if cache is not None:
+            cache.set(key, content)
+        return content
+
+async def _cache_lookup(agent, cache, key):
+    # Memory hits are served inline; only the SQLite tier goes to a thread.
+    cached = cache.get_memory(key)
+    if cached is None:
+        cached = await asyncio.to_thread(cache.get, key)
+    record_cache_lookup(agent, cached is not None)
+    return cached
+
+async def acomplete(messages, model=None, agent=None):
+    """Async variant of complete() that does not block the event loop."""
+    chain, params, timeout = _plan(agent, model)
+    cache, key = _cache_for(agent, messages, chain[0], params)
+    if cache is not None:
+        cached = await _cache_lookup(agent, cache, key)
+        if cached is not None:
+            return cached
+
+    client = get_async_client()
+    for index, attempt_model in enumerate(chain):
+        request = _request(messages, attempt_model, params, timeout, agent)
+        try:
+            with llm_call(agent, attempt_model) as call:
+                response = await gateway.acall(
+                    messages, lambda: client.chat.completions.create(**request), agent=agent, retries=_retries(chain, index)
+                )
+                content = response.choices[0].message.content
+                _record_usage(call, response.usage, messages, content)
+        except Exception as e:
+            if index == len(chain) - 1 or not _should_fall_back(e):
+                raise
+            continue
+        if cache is not None:
+            await asyncio.to_thread(cache.set, key, content)
+        return content
+
+async def astream(messages, model=None, agent=None):
+    """Stream a chat completion, yielding text deltas as they arrive."""
+    chain, params, timeout = _plan(agent, model)
+    cache, key = _cache_for(agent, messages, chain[0], params)
+    if cache is not None:
+        cached = await _cache_lookup(agent, cache, key)
+        if cached is not None:
+            yield cached
+            return
+
+    client = get_async_client()
+    for index, attempt_model in enumerate(chain):
+        request = _request(messages, attempt_model, params, timeout, agent, stream=True)
+        parts = []
+        try:
+            with llm_call(agent, attempt_model) as call:
+                # Retries cover opening the stream; once tokens flow a failure propagates.
+                # The gateway slot is held until the stream is read, closed or cancelled.
+                async with gateway.aslot(
+                    messages, lambda: client.chat.completions.create(**request), agent=agent, retries=_retries(chain, index)
+                ) as stream:
+                    usage = None
+                    async for chunk in stream:
+                        usage = chunk.usage or usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            call.first_token()
+                            parts.append(delta)
+                            yield delta
+                content = "".join(parts)
+                _record_usage(call, usage, messages, content)
+        except Exception as e:
+            # A different model can only take over before anything was sent on.
+            if parts or index == len(chain) - 1 or not _should_fall_back(e):
+                raise
+            continue
+        if cache is not None:
+            await asyncio.to_thread(cache.set, key, content)
+        return
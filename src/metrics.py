@@ -0,0 +1,306 @@
+"""Latency/token instrumentation with Prometheus and OTLP/JSON trace output.
+
+Metrics are kept in-process and rendered in the Prometheus text format by the
+API's /metrics endpoint, so no client library is needed. Spans form a trace
+per API request (the trace ID comes from the request's traceparent header or
+is generated) and, when TRACE_EXPORT is set, are exported as OTLP/JSON to a
+file or to a collector's /v1/traces endpoint by a background thread.
+"""
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from src.config import TRACE_EXPORT, TRACE_FILE, OTLP_ENDPOINT
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', f'{bound:g}')])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+LLM_CALL_SECONDS = Histogram("debater_llm_call_seconds", "Wall time of LLM calls, including queueing and retries.")
+LLM_QUEUE_SECONDS = Histogram("debater_llm_queue_wait_seconds", "Time LLM calls waited in the gateway before being sent.")
+LLM_TTFT_SECONDS = Histogram("debater_llm_time_to_first_token_seconds", "Time from starting a streamed LLM call to its first token.")
+LLM_PROMPT_TOKENS = Counter("debater_llm_prompt_tokens_total", "Prompt tokens sent to the model.")
+LLM_COMPLETION_TOKENS = Counter("debater_llm_completion_tokens_total", "Completion tokens received from the model.")
+LLM_CACHE = Counter("debater_llm_cache_lookups_total", "Response cache lookups by result.")
+LLM_ERRORS = Counter("debater_llm_errors_total", "Failed LLM calls by exception type.")
+STAGE_SECONDS = Histogram("debater_stage_seconds", "Wall time of orchestrator stages.")
+HTTP_SECONDS = Histogram("debater_http_request_seconds", "API request latency.")
+
+REGISTRY = [
+    LLM_CALL_SECONDS, LLM_QUEUE_SECONDS, LLM_TTFT_SECONDS, LLM_PROMPT_TOKENS,
+    LLM_COMPLETION_TOKENS, LLM_CACHE, LLM_ERRORS, STAGE_SECONDS, HTTP_SECONDS,
+]
+
+def render_prometheus():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ---------------------------------------------------------------------------
+# Tracing
+# ---------------------------------------------------------------------------
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def new_trace_id():
+    return os.urandom(16).hex()
+
+def trace_id_from_traceparent(header):
+    """Extract the trace ID from a W3C traceparent header, if valid."""
+    parts = (header or "").split("-")
+    if len(parts) == 4 and len(parts[1]) == 32:
+        return parts[1]
+    return None
+
+def start_trace(trace_id=None):
+    """Begin a trace for the current request; returns a token for end_trace()."""
+    return _trace_id.set(trace_id or new_trace_id())
+
+def end_trace(token):
+    _trace_id.reset(token)
+
+def current_trace_id():
+    return _trace_id.get()
+
+class Span:
+    """A timed unit of work; use as a context manager (works across awaits)."""
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = None
+        self.parent_id = None
+        self.error = None
+        self.start = self.end = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self):
+        return (self.end or time.time()) - self.start
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.trace_id = _trace_id.get() or (parent.trace_id if parent else None) or new_trace_id()
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.time()
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # An async generator closed from another task's context.
+            pass
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        exporter.submit(self)
+        return False
+
+def span(name, **attributes):
+    return Span(name, **attributes)
+
+def annotate(**attributes):
+    """Attach attributes to the innermost active span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+def observe_stage(name):
+    """Span plus stage histogram for one orchestrator stage."""
+    return _StageSpan(f"stage.{name}", stage=name)
+
+class _StageSpan(Span):
+    def __exit__(self, exc_type, exc, tb):
+        result = super().__exit__(exc_type, exc, tb)
+        STAGE_SECONDS.observe(self.end - self.start, stage=self.attributes["stage"])
+        return result
+
+class LLMCall(Span):
+    """Span for one LLM call that also feeds the llm_* metrics."""
+
+    def __init__(self, agent, model):
+        super().__init__("llm.call", agent=agent or "unknown", model=model)
+        self.first_token_at = None
+
+    def first_token(self):
+        # Only streamed calls have a first token; a blocking call's latency is in LLM_CALL_SECONDS.
+        if self.first_token_at is None:
+            self.first_token_at = time.time()
+
+    def tokens(self, prompt, completion):
+        self.set(prompt_tokens=prompt, completion_tokens=completion)
+        LLM_PROMPT_TOKENS.inc(prompt, agent=self.attributes["agent"])
+        LLM_COMPLETION_TOKENS.inc(completion, agent=self.attributes["agent"])
+
+    def __exit__(self, exc_type, exc, tb):
+        result = super().__exit__(exc_type, exc, tb)
+        agent, model = self.attributes["agent"], self.attributes["model"]
+        status = "error" if exc is not None else "ok"
+        LLM_CALL_SECONDS.observe(self.end - self.start, agent=agent, model=model, status=status)
+        if exc is not None:
+            LLM_ERRORS.inc(agent=agent, error=exc_type.__name__)
+        elif self.first_token_at is not None:
+            LLM_TTFT_SECONDS.observe(self.first_token_at - self.start, agent=agent)
+        return result
+
+def llm_call(agent, model):
+    return LLMCall(agent, model)
+
+def record_cache_lookup(agent, hit):
+    LLM_CACHE.inc(agent=agent or "unknown", result="hit" if hit else "miss")
+    annotate(**{f"cache_hit.{agent}": hit})
+
+# ---------------------------------------------------------------------------
+# OTLP/JSON export
+# ---------------------------------------------------------------------------
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(spans):
+    """Encode finished spans as an OTLP/JSON ExportTraceServiceRequest."""
+    encoded = []
+    for item in spans:
+        record = {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": 1,
+            "startTimeUnixNano": str(int(item.start * 1e9)),
+            "endTimeUnixNano": str(int(item.end * 1e9)),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in item.attributes.items()],
+            "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+        }
+        if item.parent_id:
+            record["parentSpanId"] = item.parent_id
+        encoded.append(record)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "debater"}}]},
+            "scopeSpans": [{"scope": {"name": "debater"}, "spans": encoded}],
+        }]
+    }
+
+class TraceExporter:
+    """Batches finished spans and writes them off the request path."""
+
+    BATCH_SIZE = 256
+    FLUSH_INTERVAL = 2.0
+
+    def __init__(self, mode=TRACE_EXPORT):
+        self.mode = mode
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = None
+        self.dropped = 0
+
+    def submit(self, item):
+        if not self.mode:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._export(batch)
+            except Exception:
+                self.dropped += len(batch)
+
+    def _export(self, batch):
+        payload = to_otlp(batch)
+        if self.mode == "file":
+            with open(TRACE_FILE, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(payload) + "\n")
+        elif self.mode == "otlp":
+            import httpx
+            httpx.post(OTLP_ENDPOINT, json=payload, timeout=5).raise_for_status()
+
+exporter = TraceExporter()
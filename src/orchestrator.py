@@ -1,46 +1,182 @@
-from src.agents.research import run_research_agent
-from src.agents.optimist import run_optimist_agent
-from src.agents.devil import run_devil_agent
-from src.agents.composer import run_composer_agent
-from src.agents.conversational import run_conversational_agent, SYSTEM_PROMPT as CONVERSATIONAL_PROMPT
+import asyncio
+import contextvars
+from collections import OrderedDict
+from src.agents.research import run_research_agent, run_research_agent_async, stream_research_agent
+from src.agents.optimist import run_optimist_agent, run_optimist_agent_async, stream_optimist_agent
+from src.agents.devil import run_devil_agent, run_devil_agent_async, stream_devil_agent
+from src.agents.composer import run_composer_agent, run_composer_agent_async, stream_composer_agent
+from src.agents.conversational import (
+    run_conversational_agent,
+    run_conversational_agent_async,
+    stream_chat_mode,
+    stream_conversational_agent,
+    SYSTEM_PROMPT as CONVERSATIONAL_PROMPT,
+)
+from src.scheduler import AgentGraph, StopGraph
+from src.semantic_cache import ANALYSIS_FIELDS, lookup_analysis, store_analysis
+from src.archive import archive_analysis
+from src.metrics import observe_stage
 from concurrent.futures import ThreadPoolExecutor
 
+async def _tag_tokens(agent, tokens, results):
+    """Wrap an agent's token stream in events and keep the full text in results."""
+    parts = []
+    with observe_stage(agent):
+        async for token in tokens:
+            parts.append(token)
+            yield {"type": "token", "agent": agent, "text": token}
+    results[agent] = "".join(parts)
+    yield {"type": "done", "agent": agent, "text": results[agent]}
+
+async def _merge_streams(*streams):
+    """Interleave several event streams in arrival order."""
+    queue = asyncio.Queue()
+    finished = object()
+
+    async def pump(stream):
+        try:
+            async for event in stream:
+                await queue.put(event)
+        finally:
+            await queue.put(finished)
+
+    tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await queue.get()
+            if event is finished:
+                remaining -= 1
+                continue
+            yield event
+        # Surface any agent failure once every stream has stopped.
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+# Recent intents remembered per system, so /classify followed by /analyze
+# only pays for one router call.
+INTENT_CACHE_SIZE = 64
+
 class MultiAgentSystem:
     def __init__(self):
         self.conversation_history = []
         self.session_context = {}
+        # Set by SessionStore.session() so archived analyses can be traced to their session
+        self.session_id = None
         # Initialize conversational agent history with system prompt
         self.conversational_history = [{"role": "system", "content": CONVERSATIONAL_PROMPT}]
+        self.intent_cache = OrderedDict()
+
+    def to_state(self):
+        """Return the per-session state as plain JSON-serialisable data."""
+        return {
+            "conversational_history": self.conversational_history,
+            "session_context": self.session_context,
+            "intent_cache": list(self.intent_cache.items()),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a system from the output of to_state()."""
+        system = cls()
+        system.conversational_history = state.get("conversational_history") or system.conversational_history
+        system.session_context = state.get("session_context") or {}
+        system.intent_cache = OrderedDict(state.get("intent_cache") or [])
+        return system
+
+    def _cached_intent(self, user_input):
+        from src.agents.conversational import normalize_input
+        key = normalize_input(user_input)
+        intent = self.intent_cache.get(key)
+        if intent is not None:
+            self.intent_cache.move_to_end(key)
+        return key, intent
+
+    def _remember_intent(self, key, intent):
+        self.intent_cache[key] = intent
+        if len(self.intent_cache) > INTENT_CACHE_SIZE:
+            self.intent_cache.popitem(last=False)
+        return intent
     
     def check_intent(self, user_input):
         """Public method to check intent"""
         from src.agents.conversational import check_if_ready
-        return "analysis" if check_if_ready(user_input, self.conversational_history) else "chat"
+        key, intent = self._cached_intent(user_input)
+        if intent is not None:
+            return intent
+        ready = check_if_ready(user_input, self.conversational_history)
+        return self._remember_intent(key, "analysis" if ready else "chat")
+
+    async def check_intent_async(self, user_input):
+        """Async variant of check_intent"""
+        from src.agents.conversational import check_if_ready_async
+        key, intent = self._cached_intent(user_input)
+        if intent is not None:
+            return intent
+        ready = await check_if_ready_async(user_input, self.conversational_history)
+        return self._remember_intent(key, "analysis" if ready else "chat")
 
     def run_chat(self, user_input):
         """Public method to run chat mode"""
         from src.agents.conversational import run_chat_mode
         return run_chat_mode(user_input, self.conversational_history)
 
+    async def run_chat_async(self, user_input):
+        """Async variant of run_chat"""
+        from src.agents.conversational import run_chat_mode_async
+        return await run_chat_mode_async(user_input, self.conversational_history)
+
+    def _reuse_analysis(self, user_input, cached):
+        """Make a stored analysis of a near-duplicate idea the session context."""
+        print(f"♻️  Reusing the analysis of a similar idea: {cached['similar_to']!r} ({cached['similarity']:.2f})")
+        self.session_context = {"user_input": user_input}
+        self.session_context.update((field, cached[field]) for field in ANALYSIS_FIELDS)
+        self.session_context["similar_to"] = cached["similar_to"]
+        return self.session_context
+
+    def _archive(self, source):
+        """Queue the finished analysis for the archive; a background thread writes it."""
+        metadata = {"source": source}
+        if "similar_to" in self.session_context:
+            metadata["similar_to"] = self.session_context["similar_to"]
+        archive_analysis(self.session_context, session_id=self.session_id, **metadata)
+
     def process_user_input(self, user_input):
         """Main workflow - orchestrates all agents"""
         
         # 0. Check Intent
-        intent = self.check_intent(user_input)
+        with observe_stage("intent"):
+            intent = self.check_intent(user_input)
         
         if intent == "chat":
             print("💬 Conversational Agent chatting...")
-            return self.run_chat(user_input)
+            with observe_stage("chat"):
+                return self.run_chat(user_input)
+
+        # Reuse the analysis of a near-duplicate idea if one is stored
+        cached = lookup_analysis(user_input)
+        if cached is not None:
+            self._reuse_analysis(user_input, cached)
+            with observe_stage("conversational"):
+                self.session_context["conversational_response"] = run_conversational_agent(
+                    user_input, cached["final_response"], self.conversational_history
+                )
+            self._archive("cli")
+            return self.session_context
 
         # 1. Research (Sequential)
         print("\n🔍 Research Agent analyzing...")
-        research = run_research_agent(user_input)
+        with observe_stage("research"):
+            research = run_research_agent(user_input)
         
         # 2. Parallel Execution (Optimist & Devil)
         print("\n⚡ Running Parallel Analysis (Optimist & Devil)...")
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future_optimist = executor.submit(run_optimist_agent, user_input, research)
-            future_devil = executor.submit(run_devil_agent, user_input, research)
+        with observe_stage("critics"), ThreadPoolExecutor(max_workers=2) as executor:
+            # Run in a copy of our context so per-request settings (e.g. cache bypass) carry over
+            future_optimist = executor.submit(contextvars.copy_context().run, run_optimist_agent, user_input, research)
+            future_devil = executor.submit(contextvars.copy_context().run, run_devil_agent, user_input, research)
             
             print("👍 Positive Analysis Agent evaluating...")
             print("⚠️  Flaw Finding Agent critiquing...")
@@ -50,7 +186,8 @@ class MultiAgentSystem:
         
         # 3. Synthesis (Sequential)
         print("\n📝 Response Composer Agent synthesizing...")
-        final_response = run_composer_agent(user_input, research, positives, flaws)
+        with observe_stage("composer"):
+            final_response = run_composer_agent(user_input, research, positives, flaws)
         
         # 4. Store in Session Context
         self.session_context = {
@@ -60,13 +197,188 @@ class MultiAgentSystem:
             "flaws": flaws,
             "final_response": final_response
         }
+        store_analysis(user_input, self.session_context)
         
         # 5. Conversational Delivery
         print("💬 Conversational Agent delivering response...")
-        conversational_response = run_conversational_agent(user_input, final_response, self.conversational_history)
+        with observe_stage("conversational"):
+            conversational_response = run_conversational_agent(user_input, final_response, self.conversational_history)
         
         # Update context with final conversational response
         self.session_context["conversational_response"] = conversational_response
+        self._archive("cli")
         
         # Return the full context so the API can use it
         return self.session_context
+
+    async def process_user_input_async(self, user_input):
+        """Async workflow - runs the agents as a dependency graph, no worker threads
+
+        Research starts speculatively while the intent is still being
+        classified (SPECULATIVE_RESEARCH) and is cancelled if the input turns
+        out to be chat. With CRITIC_PREFIX_CHARS the critics start as soon as
+        that much research has streamed in, and MERGE_DELIVERY folds the
+        composer and conversational stages into one call.
+        """
+        from src.agents.conversational import run_merged_delivery_async
+        from src.config import SPECULATIVE_RESEARCH, CRITIC_PREFIX_CHARS, MERGE_DELIVERY
+
+        history = self.conversational_history
+
+        # Reuse the analysis of a near-duplicate idea if one is stored
+        cached = await asyncio.to_thread(lookup_analysis, user_input)
+        if cached is not None:
+            if await self.check_intent_async(user_input) == "chat":
+                return await self.run_chat_async(user_input)
+            self._reuse_analysis(user_input, cached)
+            with observe_stage("conversational"):
+                self.session_context["conversational_response"] = await run_conversational_agent_async(
+                    user_input, cached["final_response"], history
+                )
+            self._archive("api")
+            return self.session_context
+
+        graph = AgentGraph()
+
+        # 0. Check Intent
+        async def classify(graph):
+            intent = await self.check_intent_async(user_input)
+            if intent == "chat":
+                raise StopGraph()
+            return intent
+
+        # 1. Research
+        async def research(graph):
+            if not CRITIC_PREFIX_CHARS:
+                return await run_research_agent_async(user_input)
+            parts = []
+            async for token in stream_research_agent(user_input):
+                parts.append(token)
+                if not graph.published("research_prefix") and sum(map(len, parts)) >= CRITIC_PREFIX_CHARS:
+                    graph.publish("research_prefix", "".join(parts))
+            text = "".join(parts)
+            graph.publish("research_prefix", text)
+            return text
+
+        # 2. Optimist & Devil, concurrently, on the full research or a prefix
+        critic_input = "research_prefix" if CRITIC_PREFIX_CHARS else "research"
+
+        async def optimist(graph):
+            return await run_optimist_agent_async(user_input, graph.results[critic_input])
+
+        async def devil(graph):
+            return await run_devil_agent_async(user_input, graph.results[critic_input])
+
+        # 3. Synthesis and 5. Conversational Delivery
+        async def composer(graph):
+            return await run_composer_agent_async(user_input, graph.results["research"], graph.results["optimist"], graph.results["devil"])
+
+        async def conversational(graph):
+            return await run_conversational_agent_async(user_input, graph.results["composer"], history)
+
+        async def merged(graph):
+            return await run_merged_delivery_async(
+                user_input, graph.results["research"], graph.results["optimist"], graph.results["devil"], history
+            )
+
+        graph.add("intent", classify)
+        if SPECULATIVE_RESEARCH:
+            # A research error only fails the request if the input is an idea
+            graph.add("research", research, speculative="intent")
+        else:
+            graph.add("research", research, ("intent",))
+        graph.add("optimist", optimist, (critic_input, "intent"))
+        graph.add("devil", devil, (critic_input, "intent"))
+        if MERGE_DELIVERY:
+            graph.add("delivery", merged, ("research", "optimist", "devil"))
+        else:
+            graph.add("composer", composer, ("research", "optimist", "devil"))
+            graph.add("conversational", conversational, ("composer",))
+
+        results = await graph.run()
+
+        if "intent" not in results:
+            return await self.run_chat_async(user_input)
+
+        if MERGE_DELIVERY:
+            final_response, conversational_response = results["delivery"]
+        else:
+            final_response, conversational_response = results["composer"], results["conversational"]
+
+        # 4. Store in Session Context
+        self.session_context = {
+            "user_input": user_input,
+            "research": results["research"],
+            "positives": results["optimist"],
+            "flaws": results["devil"],
+            "final_response": final_response,
+            "conversational_response": conversational_response
+        }
+        await asyncio.to_thread(store_analysis, user_input, self.session_context)
+        self._archive("api")
+        return self.session_context
+
+    async def stream_user_input(self, user_input):
+        """Streaming workflow - yields each agent's tokens as they are generated.
+
+        Events are dicts with a "type" of "intent", "token" or "done"; token
+        and done events carry the agent name (research, optimist, devil,
+        composer, conversational).
+        """
+        results = {}
+
+        # 0. Check Intent
+        intent = await self.check_intent_async(user_input)
+        yield {"type": "intent", "intent": intent}
+
+        if intent == "chat":
+            async for event in _tag_tokens("conversational", stream_chat_mode(user_input, self.conversational_history), results):
+                yield event
+            return
+
+        # Reuse the analysis of a near-duplicate idea if one is stored
+        cached = await asyncio.to_thread(lookup_analysis, user_input)
+        if cached is not None:
+            session_context = self._reuse_analysis(user_input, cached)
+            for agent, field in (("research", "research"), ("optimist", "positives"), ("devil", "flaws"), ("composer", "final_response")):
+                yield {"type": "done", "agent": agent, "text": cached[field]}
+            async for event in _tag_tokens("conversational", stream_conversational_agent(user_input, cached["final_response"], self.conversational_history), results):
+                yield event
+            session_context["conversational_response"] = results["conversational"]
+            self._archive("stream")
+            return
+
+        # 1. Research (Sequential)
+        async for event in _tag_tokens("research", stream_research_agent(user_input), results):
+            yield event
+        research = results["research"]
+
+        # 2. Concurrent Execution (Optimist & Devil), tokens interleaved
+        async for event in _merge_streams(
+            _tag_tokens("optimist", stream_optimist_agent(user_input, research), results),
+            _tag_tokens("devil", stream_devil_agent(user_input, research), results),
+        ):
+            yield event
+        positives, flaws = results["optimist"], results["devil"]
+
+        # 3. Synthesis (Sequential)
+        async for event in _tag_tokens("composer", stream_composer_agent(user_input, research, positives, flaws), results):
+            yield event
+        final_response = results["composer"]
+
+        # 4. Store in Session Context
+        session_context = {
+            "user_input": user_input,
+            "research": research,
+            "positives": positives,
+            "flaws": flaws,
+            "final_response": final_response
+        }
+        self.session_context = session_context
+        await asyncio.to_thread(store_analysis, user_input, session_context)
+
+        # 5. Conversational Delivery
+        async for event in _tag_tokens("conversational", stream_conversational_agent(user_input, final_response, self.conversational_history), results):
+            yield event
+        session_context["conversational_response"] = results["conversational"]
+        self._archive("stream")
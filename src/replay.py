@@ -0,0 +1,359 @@
+"""Record and replay LLM traffic, for benchmarks that must not hit the live API.
+
+LLM_BACKEND picks what sits under the pooled clients in src/clients.py:
+
+* "live": the Cerebras API.
+* "record": the Cerebras API, with every chat completion (agent, model,
+  messages, reply, usage, latency) appended to LLM_RECORDING as JSONL.
+* "replay": no network at all. Requests are answered in-process from
+  LLM_RECORDING: an identical request gets its recorded reply, anything else
+  gets another recorded reply of the same agent, or filler text if the
+  recording has none. Time to first token follows a lognormal distribution
+  (REPLAY_TTFT_MS median, REPLAY_TTFT_P99_MS tail), tokens then arrive at
+  REPLAY_TOKENS_PER_S, and REPLAY_ERROR_RATE of requests fail with a 503.
+  Draws come from a generator seeded with REPLAY_SEED.
+
+The agent name travels in the AGENT_HEADER request header, which src/llm.py
+only sets when the backend is not "live".
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+
+import httpx
+
+from src.config import (
+    LLM_RECORDING,
+    REPLAY_TTFT_MS,
+    REPLAY_TTFT_P99_MS,
+    REPLAY_TOKENS_PER_S,
+    REPLAY_ERROR_RATE,
+    REPLAY_SEED,
+)
+
+AGENT_HEADER = "X-Debater-Agent"
+
+# Filler reply length per agent when the recording has nothing to offer,
+# about what each prompt's word limit produces.
+FILLER_WORDS = {"router": 1, "chat": 60, "research": 150, "optimist": 150, "devil": 150,
+                "composer": 200, "conversational": 180}
+FILLER = ("This idea has clear strengths and real risks worth weighing carefully. " * 40).split()
+
+def request_key(model, messages):
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _is_completion(request):
+    return request.method == "POST" and request.url.path.endswith("/chat/completions")
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+def _parse_reply(status, headers, raw):
+    """Return (content, usage) from a recorded JSON or SSE response body."""
+    response = httpx.Response(status, headers=headers, content=raw)
+    response.read()
+    if status != 200:
+        return None, None
+    if "text/event-stream" not in response.headers.get("content-type", ""):
+        body = response.json()
+        return body["choices"][0]["message"]["content"], body.get("usage")
+    parts, usage = [], None
+    for line in response.text.splitlines():
+        if not line.startswith("data: ") or line == "data: [DONE]":
+            continue
+        chunk = json.loads(line[len("data: "):])
+        usage = chunk.get("usage") or usage
+        for choice in chunk.get("choices") or []:
+            parts.append((choice.get("delta") or {}).get("content") or "")
+    return "".join(parts), usage
+
+class Recorder:
+    """Appends one JSON line per chat completion to a file."""
+
+    def __init__(self, path=LLM_RECORDING):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, request, status, headers, raw, started, first_byte):
+        body = json.loads(request.content)
+        content, usage = _parse_reply(status, headers, raw)
+        entry = {
+            "agent": request.headers.get(AGENT_HEADER),
+            "model": body.get("model"),
+            "key": request_key(body.get("model"), body.get("messages")),
+            "messages": body.get("messages"),
+            "stream": bool(body.get("stream")),
+            "status": status,
+            "content": content,
+            "usage": usage,
+            "ttft_ms": round((first_byte - started) * 1000, 1) if first_byte else None,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "recorded": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+class _TeeStream(httpx.SyncByteStream):
+    def __init__(self, inner, on_close):
+        self.inner, self.on_close = inner, on_close
+        self.parts, self.first_byte = [], None
+
+    def __iter__(self):
+        for chunk in self.inner:
+            if self.first_byte is None:
+                self.first_byte = time.perf_counter()
+            self.parts.append(chunk)
+            yield chunk
+
+    def close(self):
+        self.inner.close()
+        self.on_close(b"".join(self.parts), self.first_byte)
+
+class _AsyncTeeStream(httpx.AsyncByteStream):
+    def __init__(self, inner, on_close):
+        self.inner, self.on_close = inner, on_close
+        self.parts, self.first_byte = [], None
+
+    async def __aiter__(self):
+        async for chunk in self.inner:
+            if self.first_byte is None:
+                self.first_byte = time.perf_counter()
+            self.parts.append(chunk)
+            yield chunk
+
+    async def aclose(self):
+        await self.inner.aclose()
+        self.on_close(b"".join(self.parts), self.first_byte)
+
+def _teed(request, response, stream_class, recorder, started):
+    def on_close(raw, first_byte):
+        recorder.write(request, response.status_code, response.headers, raw, started, first_byte)
+
+    return httpx.Response(
+        response.status_code,
+        headers=response.headers,
+        stream=stream_class(response.stream, on_close),
+        extensions=response.extensions,
+    )
+
+class RecordingTransport(httpx.BaseTransport):
+    """Wraps a transport and records every chat completion passing through it."""
+
+    def __init__(self, inner, recorder):
+        self.inner, self.recorder = inner, recorder
+
+    def handle_request(self, request):
+        if not _is_completion(request):
+            return self.inner.handle_request(request)
+        started = time.perf_counter()
+        response = self.inner.handle_request(request)
+        return _teed(request, response, _TeeStream, self.recorder, started)
+
+    def close(self):
+        self.inner.close()
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    """Async variant of RecordingTransport."""
+
+    def __init__(self, inner, recorder):
+        self.inner, self.recorder = inner, recorder
+
+    async def handle_async_request(self, request):
+        if not _is_completion(request):
+            return await self.inner.handle_async_request(request)
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        return _teed(request, response, _AsyncTeeStream, self.recorder, started)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+class Replayer:
+    """Picks the reply, delay and outcome of each replayed request."""
+
+    def __init__(self, path=LLM_RECORDING, ttft_ms=REPLAY_TTFT_MS, ttft_p99_ms=REPLAY_TTFT_P99_MS,
+                 tokens_per_s=REPLAY_TOKENS_PER_S, error_rate=REPLAY_ERROR_RATE, seed=REPLAY_SEED):
+        self.tokens_per_s = tokens_per_s
+        self.error_rate = error_rate
+        # Lognormal with the given median and 99th percentile (z = 2.326).
+        self._mu = math.log(max(ttft_ms, 0.001) / 1000)
+        self._sigma = math.log(ttft_p99_ms / ttft_ms) / 2.326 if ttft_p99_ms > ttft_ms > 0 else 0.0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_agent = {}
+        self._next = {}
+        self.stats = {"exact": 0, "agent": 0, "filler": 0, "errors": 0}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry.get("status") != 200 or entry.get("content") is None:
+                        continue
+                    self._by_key[entry["key"]] = entry
+                    self._by_agent.setdefault(entry.get("agent"), []).append(entry)
+
+    def reply(self, body, agent):
+        """Return the reply text for a request body."""
+        entry = self._by_key.get(request_key(body.get("model"), body.get("messages")))
+        with self._lock:
+            if entry is not None:
+                self.stats["exact"] += 1
+                return entry["content"]
+            entries = self._by_agent.get(agent)
+            if entries:
+                self.stats["agent"] += 1
+                index = self._next.get(agent, 0)
+                self._next[agent] = index + 1
+                return entries[index % len(entries)]["content"]
+            self.stats["filler"] += 1
+        if agent == "router" or "Intent Classifier" in json.dumps(body.get("messages")):
+            return "READY"
+        return " ".join(FILLER[:FILLER_WORDS.get(agent, 120)])
+
+    def plan(self, request):
+        """Return (status, reply, time to first token, seconds per token)."""
+        body = json.loads(request.content)
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            ttft = self._random.lognormvariate(self._mu, self._sigma) if self._sigma else math.exp(self._mu)
+            if failed:
+                self.stats["errors"] += 1
+        if failed:
+            return 503, None, ttft, 0.0
+        content = self.reply(body, request.headers.get(AGENT_HEADER))
+        per_token = 1 / self.tokens_per_s if self.tokens_per_s else 0.0
+        return 200, content, ttft, per_token
+
+def _tokens(content):
+    words = content.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+def _completion(model, content, prompt_tokens):
+    completion_tokens = len(content.split())
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "system_fingerprint": "replay",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+def _chunk(completion_id, model, delta, finish_reason=None):
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "system_fingerprint": "replay",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+def _prompt_tokens(body):
+    return sum(len(str(m.get("content", "")).split()) for m in body.get("messages") or [])
+
+class _ReplayStream(httpx.SyncByteStream):
+    def __init__(self, model, tokens, per_token):
+        self.model, self.tokens, self.per_token = model, tokens, per_token
+
+    def __iter__(self):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for i, token in enumerate(self.tokens):
+            if i and self.per_token:
+                time.sleep(self.per_token)
+            yield _chunk(completion_id, self.model, {"content": token})
+        yield _chunk(completion_id, self.model, {}, "stop")
+        yield b"data: [DONE]\n\n"
+
+class _AsyncReplayStream(httpx.AsyncByteStream):
+    def __init__(self, model, tokens, per_token):
+        self.model, self.tokens, self.per_token = model, tokens, per_token
+
+    async def __aiter__(self):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for i, token in enumerate(self.tokens):
+            if i and self.per_token:
+                await asyncio.sleep(self.per_token)
+            yield _chunk(completion_id, self.model, {"content": token})
+        yield _chunk(completion_id, self.model, {}, "stop")
+        yield b"data: [DONE]\n\n"
+
+def _replay_response(request, status, tokens, per_token, stream_class):
+    if status != 200:
+        return httpx.Response(status, json={"message": "injected failure"})
+    body = json.loads(request.content)
+    model = body.get("model", "replay")
+    if body.get("stream"):
+        return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                              stream=stream_class(model, tokens, per_token))
+    return httpx.Response(200, json=_completion(model, "".join(tokens), _prompt_tokens(body)))
+
+class ReplayTransport(httpx.BaseTransport):
+    """In-process stand-in for the Cerebras API, driven by a Replayer."""
+
+    def __init__(self, replayer):
+        self.replayer = replayer
+
+    def handle_request(self, request):
+        if not _is_completion(request):
+            return httpx.Response(200, text="ok")
+        status, content, ttft, per_token = self.replayer.plan(request)
+        time.sleep(ttft)
+        if status == 200 and not json.loads(request.content).get("stream"):
+            time.sleep(per_token * max(0, len(content.split()) - 1))
+        tokens = _tokens(content) if content is not None else []
+        return _replay_response(request, status, tokens, per_token, _ReplayStream)
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    """Async variant of ReplayTransport."""
+
+    def __init__(self, replayer):
+        self.replayer = replayer
+
+    async def handle_async_request(self, request):
+        if not _is_completion(request):
+            return httpx.Response(200, text="ok")
+        status, content, ttft, per_token = self.replayer.plan(request)
+        await asyncio.sleep(ttft)
+        if status == 200 and not json.loads(request.content).get("stream"):
+            await asyncio.sleep(per_token * max(0, len(content.split()) - 1))
+        tokens = _tokens(content) if content is not None else []
+        return _replay_response(request, status, tokens, per_token, _AsyncReplayStream)
+
+_recorder = None
+_replayer = None
+_lock = threading.Lock()
+
+def get_recorder():
+    global _recorder
+    with _lock:
+        if _recorder is None:
+            _recorder = Recorder()
+        return _recorder
+
+def get_replayer():
+    global _replayer
+    with _lock:
+        if _replayer is None:
+            _replayer = Replayer()
+        return _replayer
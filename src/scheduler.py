@@ -0,0 +1,82 @@
+"""Minimal dependency-driven scheduler for the agent graph.
+
+Stages are coroutines that start as soon as every key they depend on has been
+published. A stage publishes its own name (with its return value) when it
+finishes and may publish extra keys while still running, e.g. a partial
+research result that lets the critics start early. Raising StopGraph from a
+stage cancels everything still running.
+
+A speculative stage starts before it is known to be needed; its errors are
+held back until the key that confirms it is published, and dropped if the
+graph stops first.
+"""
+import asyncio
+
+from src.metrics import observe_stage
+
+class StopGraph(Exception):
+    """Raised by a stage to cancel the rest of the graph (e.g. intent is chat)."""
+
+class AgentGraph:
+    def __init__(self):
+        self._stages = []
+        self.results = {}
+        self._futures = {}
+
+    def add(self, name, run, deps=(), speculative=None):
+        """Register a stage; run(graph) is awaited once all deps are published.
+
+        With speculative set to a key, errors from the stage only surface once
+        that key is published.
+        """
+        self._stages.append((name, run, tuple(deps), speculative))
+        return self
+
+    def _future(self, key):
+        if key not in self._futures:
+            self._futures[key] = asyncio.get_running_loop().create_future()
+        return self._futures[key]
+
+    def publish(self, key, value):
+        """Make key available to waiting stages; later publishes are ignored."""
+        future = self._future(key)
+        if not future.done():
+            self.results[key] = value
+            future.set_result(value)
+
+    def published(self, key):
+        return key in self._futures and self._futures[key].done()
+
+    async def _run_stage(self, name, run, deps, speculative):
+        for key in deps:
+            await self._future(key)
+        try:
+            with observe_stage(name):
+                result = await run(self)
+        except StopGraph:
+            raise
+        except Exception:
+            if speculative is not None:
+                # Cancelled here if the graph stops before the stage is needed.
+                await self._future(speculative)
+            raise
+        self.publish(name, result)
+
+    async def run(self):
+        """Run every stage; returns the published results.
+
+        If a stage raises StopGraph the other stages are cancelled and the
+        partial results are returned; any other exception propagates (for
+        speculative stages, only once they turn out to be needed).
+        """
+        tasks = [asyncio.create_task(self._run_stage(*stage)) for stage in self._stages]
+        try:
+            await asyncio.gather(*tasks)
+        except StopGraph:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let cancelled stages unwind (and close their HTTP streams).
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return self.results
@@ -0,0 +1,408 @@
+"""Near-duplicate cache for whole analyses.
+
+Users phrase the same idea many ways ("coffee drone delivery" vs "drones that
+deliver coffee"), which the exact-match response cache cannot see. Here each
+analysed idea is embedded as a hashed n-gram vector (stemmed words, word
+bigrams and character trigrams, no model needed) and kept in a fixed-size
+matrix that is memory-mapped from SEMANTIC_CACHE_DIR, with the agent outputs
+in SQLite next to it.
+
+A lookup only scores the rows that share one of the query's rarest word stems
+(an inverted index over stem hashes), so a typical lookup takes about a
+millisecond with a million stored ideas. Ideas made only of common words are
+slower (tens of milliseconds), as MAX_POSTING rows of each probed list are
+scored. When the matrix is full the oldest rows are overwritten, and rows
+older than CACHE_TTL are ignored.
+
+Long pitches share most of their n-grams even when the domain or market
+changes ("plant diseases ... farmers" vs "skin diseases ... patients"), so a
+match above SEMANTIC_THRESHOLD is only used if the two ideas' word stems
+differ by at most MAX_STEM_CHANGES on each side.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one process per cache directory
+    fcntl = None
+
+from src.cache import cache_bypassed
+from src.config import (
+    CACHE_TTL,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_DIR,
+    SEMANTIC_THRESHOLD,
+    SEMANTIC_MAX_ENTRIES,
+    SEMANTIC_DIM,
+)
+from src.metrics import record_cache_lookup
+
+# Outputs reused on a hit; the conversational delivery is always regenerated.
+ANALYSIS_FIELDS = ("research", "positives", "flaws", "final_response")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "for", "to", "of", "in", "on", "at", "by", "with", "from",
+    "that", "which", "who", "is", "are", "be", "it", "its", "this", "my", "our", "your", "their",
+    "i", "we", "you", "they", "want", "build", "make", "idea", "app", "platform", "service",
+    "using", "use", "like", "based", "into", "about", "what", "if", "can", "will", "would",
+}
+SUFFIXES = ("ing", "ies", "ion", "ers", "ery", "ed", "er", "ly", "s", "e", "y")
+
+# Stem hashes stored per row for the inverted index, and how many of the
+# query's rarest stems are probed. A near-duplicate differs in at most
+# MAX_MISSING stems, so it appears in all but MAX_MISSING of the probed lists.
+MAX_KEYS = 8
+PROBE_KEYS = 4
+MAX_MISSING = 1
+# Longest slice of one posting list that is scored.
+MAX_POSTING = 4096
+# Stems either idea may have that the other lacks for a match to count.
+MAX_STEM_CHANGES = 1
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def stem(word):
+    """Strip common suffixes until none apply, so drones/drone and delivery/deliver meet."""
+    changed = True
+    while changed:
+        changed = False
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                changed = True
+                break
+    return word
+
+def stems(text):
+    words = _WORD_RE.findall(text.lower())
+    return [stem(w) for w in words if w not in STOPWORDS and len(w) > 1]
+
+def same_idea(text, other):
+    """True if text and other differ by at most MAX_STEM_CHANGES stems each way."""
+    a, b = set(stems(text)), set(stems(other))
+    return len(a - b) <= MAX_STEM_CHANGES and len(b - a) <= MAX_STEM_CHANGES
+
+def _hash(feature):
+    return zlib.crc32(feature.encode("utf-8"))
+
+def embed(text, dim=SEMANTIC_DIM):
+    """Return (unit float32 vector, sorted stem hashes) for text."""
+    words = stems(text)
+    features = [(w, 1.0) for w in words]
+    features += [(f"{a} {b}", 0.3) for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        features += [(padded[i:i + 3], 0.3) for i in range(len(padded) - 2)]
+
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in features:
+        h = _hash(feature)
+        vector[h % dim] += weight if (h >> 16) & 1 else -weight
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    # The lowest hashes give an order-independent subset of the stems.
+    keys = sorted({_hash(w) or 1 for w in words})[:MAX_KEYS]
+    return vector, keys
+
+class SemanticIndex:
+    """Fixed-capacity ring of idea vectors with an inverted index over stem hashes.
+
+    vectors (float16), keys and created timestamps are .npy files opened as
+    memory maps, so they persist across restarts without being loaded into
+    memory; with path=None everything lives in memory.
+    """
+
+    # Inserts since the last rebuild before the posting lists are rebuilt.
+    REBUILD_MIN = 10000
+    # Memory maps are flushed every this many inserts.
+    FLUSH_EVERY = 100
+
+    def __init__(self, path=SEMANTIC_CACHE_DIR, capacity=SEMANTIC_MAX_ENTRIES,
+                 dim=SEMANTIC_DIM, ttl=CACHE_TTL, threshold=SEMANTIC_THRESHOLD):
+        self.capacity = capacity
+        self.dim = dim
+        self.ttl = ttl
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "inserts": 0}
+        self._inserts = 0
+
+        self._conn = None
+        self._payloads = {}
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.vectors = self._open(path, "vectors", np.float16, (capacity, dim))
+            self.keys = self._open(path, "keys", np.uint32, (capacity, MAX_KEYS))
+            self.created = self._open(path, "created", np.float64, (capacity,))
+            self._conn = sqlite3.connect(os.path.join(path, "analyses.db"), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "row INTEGER PRIMARY KEY, idea TEXT NOT NULL, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+        else:
+            self.vectors = np.zeros((capacity, dim), dtype=np.float16)
+            self.keys = np.zeros((capacity, MAX_KEYS), dtype=np.uint32)
+            self.created = np.zeros(capacity, dtype=np.float64)
+
+        # created is written last, so a row only counts once it is complete.
+        self.size = int(np.count_nonzero(self.created))
+        self.next_row = (int(np.argmax(self.created)) + 1) % capacity if self.size else 0
+        self._rebuild_postings()
+
+    @staticmethod
+    def _open(path, name, dtype, shape):
+        filename = os.path.join(path, f"{name}.npy")
+        if os.path.exists(filename):
+            array = np.lib.format.open_memmap(filename, mode="r+")
+            if array.shape == shape and array.dtype == dtype:
+                return array
+            # Capacity or dimension changed: start over.
+            del array
+        return np.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=shape)
+
+    def _rebuild_postings(self):
+        """Rebuild the sorted (stem hash -> rows) arrays from the keys matrix."""
+        rows = np.nonzero(self.created)[0]
+        keys = np.asarray(self.keys[rows])
+        flat_rows = np.repeat(rows, MAX_KEYS)
+        flat_keys = keys.ravel()
+        filled = flat_keys != 0
+        flat_rows, flat_keys = flat_rows[filled], flat_keys[filled]
+        order = np.lexsort((flat_rows, flat_keys))
+        self._post_rows = flat_rows[order]
+        self._post_keys, self._post_start = np.unique(flat_keys[order], return_index=True)
+        self._post_end = np.append(self._post_start[1:], len(self._post_rows))
+        self._delta = {}
+        self._delta_count = 0
+
+    def _locate(self, key):
+        """(start, end) of key's slice of the sorted postings, plus its pending rows."""
+        i = np.searchsorted(self._post_keys, key)
+        if i < len(self._post_keys) and self._post_keys[i] == key:
+            start, end = int(self._post_start[i]), int(self._post_end[i])
+        else:
+            start = end = 0
+        return start, end, self._delta.get(key, ())
+
+    def _search(self, vector, keys):
+        # Only the rarest stems are probed, and at most MAX_POSTING rows each.
+        located = [self._locate(key) for key in keys]
+        located = [entry for entry in located if entry[1] > entry[0] or entry[2]]
+        if not located:
+            return None, 0.0
+        located.sort(key=lambda entry: entry[1] - entry[0] + len(entry[2]))
+        postings = []
+        complete = 0
+        for start, end, pending in located[:PROBE_KEYS]:
+            complete += end - start + len(pending) <= MAX_POSTING
+            pending = pending[-MAX_POSTING:]
+            start = max(start, end - (MAX_POSTING - len(pending)))
+            postings.append(self._post_rows[start:end])
+            postings.append(np.asarray(pending, dtype=np.int64))
+
+        # Only lists read in full can be counted on to contain the match, and
+        # stems no stored idea has count against the allowance.
+        unseen = len(keys) - len(located)
+        need = max(1, complete - max(0, MAX_MISSING - unseen))
+        # A row listed twice under one stem (overwritten, then re-added) only
+        # makes it a candidate more easily; it is scored exactly below.
+        candidates, counts = np.unique(np.concatenate(postings), return_counts=True)
+        candidates = candidates[counts >= need]
+        fresh = self.created[candidates] > time.time() - self.ttl
+        candidates = candidates[fresh]
+        if not len(candidates):
+            return None, 0.0
+        scores = self.vectors[candidates].astype(np.float32) @ vector
+        best = int(np.argmax(scores))
+        return int(candidates[best]), float(scores[best])
+
+    def search(self, text):
+        """Return (row, similarity) of the closest stored idea, or (None, 0.0)."""
+        vector, keys = embed(text, self.dim)
+        with self._lock:
+            return self._search(vector, keys)
+
+    def lookup(self, text):
+        """Return the stored analysis of a near-duplicate idea, or None.
+
+        The result carries the matched idea and its similarity alongside the
+        agent outputs.
+        """
+        row, score = self.search(text)
+        if row is None or score < self.threshold:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        payload = self._load(row)
+        if payload is not None and not same_idea(text, payload["similar_to"]):
+            payload = None
+        with self._lock:
+            self._stats["hits" if payload is not None else "misses"] += 1
+        if payload is not None:
+            payload["similarity"] = round(score, 4)
+        return payload
+
+    def _load(self, row):
+        if self._conn is None:
+            entry = self._payloads.get(row)
+        else:
+            with self._lock:
+                entry = self._conn.execute(
+                    "SELECT idea, value FROM analyses WHERE row = ?", (row,)
+                ).fetchone()
+        if entry is None:
+            return None
+        idea, value = entry
+        payload = json.loads(value) if self._conn is not None else dict(value)
+        payload["similar_to"] = idea
+        return payload
+
+    def add(self, text, payload):
+        """Store an analysis. A repeat of an already stored idea replaces it."""
+        return self.add_many([(text, payload)])[0]
+
+    def add_many(self, items):
+        """Store (idea, analysis) pairs in one transaction; returns their rows."""
+        return self._add(items, replace=True)
+
+    def bulk_add(self, items):
+        """Append (idea, analysis) pairs without looking for a stored duplicate first.
+
+        For seeding a large index (e.g. benchmarks/bench_semantic.py): about
+        three times faster than add_many(), but a repeated idea gets a second row.
+        """
+        return self._add(items, replace=False)
+
+    def _add(self, items, replace):
+        rows = []
+        with self._lock:
+            for text, payload in items:
+                vector, keys = embed(text, self.dim)
+                row, score = self._search(vector, keys) if replace else (None, 0.0)
+                if row is None or score < 0.999:
+                    row = self.next_row
+                    self.next_row = (row + 1) % self.capacity
+                    self.size = min(self.size + 1, self.capacity)
+
+                if self._conn is None:
+                    self._payloads[row] = (text, dict(payload))
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO analyses (row, idea, value) VALUES (?, ?, ?)",
+                        (row, text, json.dumps(payload)),
+                    )
+                self.vectors[row] = vector
+                self.keys[row] = 0
+                self.keys[row, :len(keys)] = keys
+                self.created[row] = time.time()
+
+                # Stale postings for an overwritten row are harmless: the row
+                # is re-scored against its current vector on every lookup.
+                for key in keys:
+                    self._delta.setdefault(key, []).append(row)
+                self._delta_count += 1
+                if self._delta_count >= max(self.REBUILD_MIN, self.size // 4):
+                    self._rebuild_postings()
+                rows.append(row)
+
+            if self._conn is not None:
+                self._conn.commit()
+            self._stats["inserts"] += len(rows)
+            before = self._inserts
+            self._inserts += len(rows)
+            if self._inserts // self.FLUSH_EVERY != before // self.FLUSH_EVERY:
+                self.flush()
+        return rows
+
+    def flush(self):
+        for array in (self.vectors, self.keys, self.created):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def clear(self):
+        with self._lock:
+            self.created[:] = 0
+            self.keys[:] = 0
+            self.size = self.next_row = 0
+            self._payloads.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM analyses")
+                self._conn.commit()
+            self.flush()
+            self._rebuild_postings()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self.size
+            stats["capacity"] = self.capacity
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+_index = None
+_index_lock = threading.Lock()
+
+_slot_locks = []
+
+def _claim_dir(path):
+    """A subdirectory of path that no other running process is using.
+
+    The memory maps are written without coordination between processes, so
+    each API worker (see src/launcher.py) holds an exclusive lock on its own
+    slot for as long as it runs; a restarted worker picks a free slot again.
+    """
+    if fcntl is None:
+        return path
+    os.makedirs(path, exist_ok=True)
+    slot = 0
+    while True:
+        handle = open(os.path.join(path, f"worker-{slot}.lock"), "w")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            slot += 1
+            continue
+        _slot_locks.append(handle)
+        return os.path.join(path, f"worker-{slot}")
+
+def get_semantic_cache():
+    """Return the process-wide index, or None if it is off for this call."""
+    global _index
+    if not SEMANTIC_CACHE_ENABLED or cache_bypassed():
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SemanticIndex(path=_claim_dir(SEMANTIC_CACHE_DIR) if SEMANTIC_CACHE_DIR else None)
+    return _index
+
+def lookup_analysis(user_input):
+    """Stored analysis of a near-duplicate idea, or None."""
+    index = get_semantic_cache()
+    if index is None:
+        return None
+    result = index.lookup(user_input)
+    record_cache_lookup("semantic", result is not None)
+    return result
+
+def store_analysis(user_input, result):
+    """Remember a finished analysis for near-duplicate lookups."""
+    index = get_semantic_cache()
+    if index is not None:
+        index.add(user_input, {field: result[field] for field in ANALYSIS_FIELDS})
+
+def semantic_stats():
+    return _index.stats() if _index is not None else {}
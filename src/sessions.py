@@ -0,0 +1,230 @@
+"""Per-session state for the API.
+
+Each session owns its own MultiAgentSystem (conversational history, last
+analysis and intent cache). Stores hand out a per-session asyncio lock, so
+requests for the same session are serialised while different sessions never
+contend on one object. The SQLite store also claims the session in the
+database for the whole request, since API workers sharing it would otherwise
+load the same state and the last save would win.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from src.config import SESSION_STORE, SESSION_DB_PATH, SESSION_TTL, SESSION_MAX
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+class SessionStore:
+    """Base class: subclasses implement load() and save()."""
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        # Locks are dropped automatically once no request holds them.
+        self._locks = weakref.WeakValueDictionary()
+
+    def load(self, session_id):
+        """Return the session's MultiAgentSystem, or None if unknown/expired."""
+        raise NotImplementedError
+
+    def save(self, session_id, system):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Release the store's resources (on API shutdown)."""
+
+    async def _claim(self, session_id):
+        """Hold session_id against other processes; returns a token for _unclaim(), or None."""
+        return None
+
+    def _unclaim(self, session_id, claim):
+        pass
+
+    def _lock(self, session_id):
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+    @asynccontextmanager
+    async def _held(self, session_id):
+        async with self._lock(session_id):
+            claim = await self._claim(session_id)
+            try:
+                yield
+            finally:
+                if claim is not None:
+                    await asyncio.to_thread(self._unclaim, session_id, claim)
+
+    @asynccontextmanager
+    async def session(self, session_id=None):
+        """Lock, load (or create) and afterwards save a session.
+
+        Yields (session_id, system). Unknown or expired IDs get a fresh
+        session with a new ID.
+        """
+        if session_id:
+            async with self._held(session_id):
+                system = await asyncio.to_thread(self.load, session_id)
+                if system is not None:
+                    system.session_id = session_id
+                    yield session_id, system
+                    await asyncio.to_thread(self.save, session_id, system)
+                    return
+        session_id = new_session_id()
+        async with self._held(session_id):
+            from src.orchestrator import MultiAgentSystem
+            system = MultiAgentSystem()
+            system.session_id = session_id
+            yield session_id, system
+            await asyncio.to_thread(self.save, session_id, system)
+
+class MemorySessionStore(SessionStore):
+    """In-process store with LRU and TTL eviction."""
+
+    def __init__(self, max_sessions=SESSION_MAX, ttl=SESSION_TTL):
+        super().__init__(ttl)
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def load(self, session_id):
+        with self._mutex:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            system, touched = entry
+            if time.monotonic() - touched > self.ttl:
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return system
+
+    def save(self, session_id, system):
+        now = time.monotonic()
+        with self._mutex:
+            self._sessions[session_id] = (system, now)
+            self._sessions.move_to_end(session_id)
+            # Oldest entries sit at the front, so expiry and LRU share one sweep.
+            while self._sessions:
+                oldest_id, (_, touched) = next(iter(self._sessions.items()))
+                if len(self._sessions) > self.max_sessions or now - touched > self.ttl:
+                    del self._sessions[oldest_id]
+                else:
+                    break
+
+    def delete(self, session_id):
+        with self._mutex:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+class SQLiteSessionStore(SessionStore):
+    """Disk-backed store; sessions survive restarts and are shared by workers."""
+
+    # Expired rows are swept every this many saves.
+    PURGE_EVERY = 500
+    # A claim outlives its request only if the worker died; it is then
+    # ignored after this many seconds.
+    CLAIM_SECONDS = 300
+    CLAIM_POLL = 0.05
+
+    def __init__(self, path=SESSION_DB_PATH, ttl=SESSION_TTL):
+        super().__init__(ttl)
+        self._mutex = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_claims ("
+            "id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._saves = 0
+
+    def load(self, session_id):
+        with self._mutex:
+            row = self._conn.execute(
+                "SELECT state, updated FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        from src.orchestrator import MultiAgentSystem
+        return MultiAgentSystem.from_state(json.loads(row[0]))
+
+    def save(self, session_id, system):
+        state = json.dumps(system.to_state())
+        now = time.time()
+        with self._mutex:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, updated) VALUES (?, ?, ?)",
+                (session_id, state, now),
+            )
+            self._saves += 1
+            if self._saves % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM sessions WHERE updated < ?", (now - self.ttl,))
+                self._conn.execute("DELETE FROM session_claims WHERE expires < ?", (now,))
+            self._conn.commit()
+
+    def _try_claim(self, session_id, owner):
+        now = time.time()
+        with self._mutex:
+            # Takes the row unless another owner holds an unexpired claim
+            cursor = self._conn.execute(
+                "INSERT INTO session_claims (id, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE session_claims.expires < ?",
+                (session_id, owner, now + self.CLAIM_SECONDS, now),
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    async def _claim(self, session_id):
+        owner = uuid.uuid4().hex
+        while not await asyncio.to_thread(self._try_claim, session_id, owner):
+            await asyncio.sleep(self.CLAIM_POLL)
+        return owner
+
+    def _unclaim(self, session_id, claim):
+        with self._mutex:
+            self._conn.execute("DELETE FROM session_claims WHERE id = ? AND owner = ?", (session_id, claim))
+            self._conn.commit()
+
+    def delete(self, session_id):
+        with self._mutex:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._mutex:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        with self._mutex:
+            self._conn.close()
+
+def create_store(kind=SESSION_STORE):
+    """Build the store selected by the SESSION_STORE setting."""
+    if kind == "memory":
+        return MemorySessionStore()
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown SESSION_STORE '{kind}' (expected 'memory' or 'sqlite')")
@@ -0,0 +1,188 @@
+"""Serve frontend/ from the API process.
+
+Assets are read once, with gzip and brotli variants, a strong ETag and a
+Content-Type, and kept in memory until a file under FRONTEND_DIR changes.
+index.html is rewritten to load style.css and script.js as ?v=<etag> URLs, so
+those can be cached for a year while index.html itself is always revalidated
+(a 304 when unchanged).
+
+Compressing with brotli at maximum quality takes a while, so the compressed
+variants are written next to the assets as .br/.gz files ahead of time:
+
+    python -m src.static        # also run by `python main.py serve`
+
+Anything not precompressed (or stale) is compressed in memory on first use.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from src.config import FRONTEND_DIR, STATIC_MAX_AGE
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip still works
+    brotli = None
+
+# File types served from FRONTEND_DIR; anything else (server.py, README.md) is not.
+SERVED_TYPES = {".html", ".css", ".js", ".svg", ".png", ".ico", ".json", ".txt", ".woff2"}
+COMPRESSIBLE_TYPES = {".html", ".css", ".js", ".svg", ".json", ".txt"}
+INDEX = "index.html"
+
+# Local stylesheet and script references in index.html, versioned with their ETag.
+_ASSET_REF = re.compile(r'(href|src)="([\w./-]+\.(?:css|js))"')
+
+def _compress(path, data, suffix, compress):
+    """Precompressed file next to path if it is up to date, else compress now."""
+    packed = path + suffix
+    try:
+        if os.stat(packed).st_mtime_ns >= os.stat(path).st_mtime_ns:
+            with open(packed, "rb") as handle:
+                return handle.read()
+    except FileNotFoundError:
+        pass
+    return compress(data)
+
+def _gzip(data):
+    # mtime=0 keeps the output (and so the precompressed file) reproducible
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+def _encoders():
+    encoders = {"gzip": (".gz", _gzip)}
+    if brotli is not None:
+        encoders["br"] = (".br", _brotli)
+    return encoders
+
+class Asset:
+    """One file's bytes, compressed variants and validators."""
+
+    def __init__(self, name, data, path=None):
+        self.name = name
+        self.body = data
+        self.etag = hashlib.sha256(data).hexdigest()[:20]
+        extension = os.path.splitext(name)[1]
+        self.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or extension == ".js":
+            self.content_type += "; charset=utf-8"
+        self.encoded = {}
+        if extension in COMPRESSIBLE_TYPES:
+            for encoding, (suffix, compress) in _encoders().items():
+                packed = _compress(path, data, suffix, compress) if path and name != INDEX else compress(data)
+                if len(packed) < len(data):
+                    self.encoded[encoding] = packed
+
+    def variant(self, accept_encoding):
+        """(encoding or None, body) for an Accept-Encoding header."""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.encoded:
+                return encoding, self.encoded[encoding]
+        return None, self.body
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+def _served_files(root):
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return []
+    # (name, mtime, size) of each served file; any difference means a reload
+    return sorted(
+        (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for entry in entries
+        if entry.is_file() and os.path.splitext(entry.name)[1] in SERVED_TYPES
+    )
+
+class StaticSite:
+    """All served assets of a directory, reloaded when any of them changes."""
+
+    def __init__(self, root=FRONTEND_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._signature = None
+        self._assets = {}
+
+    def _load(self, files):
+        assets = {}
+        for name, _, _ in files:
+            if name == INDEX:
+                continue
+            path = os.path.join(self.root, name)
+            with open(path, "rb") as handle:
+                assets[name] = Asset(name, handle.read(), path)
+        if any(name == INDEX for name, _, _ in files):
+            with open(os.path.join(self.root, INDEX), encoding="utf-8") as handle:
+                html = handle.read()
+
+            def version(match):
+                asset = assets.get(match.group(2).lstrip("./"))
+                if asset is None:
+                    return match.group(0)
+                return f'{match.group(1)}="{match.group(2)}?v={asset.etag}"'
+
+            assets[INDEX] = Asset(INDEX, _ASSET_REF.sub(version, html).encode("utf-8"))
+        return assets
+
+    def get(self, name):
+        """The Asset for a request path relative to the root, or None."""
+        name = name.strip("/") or INDEX
+        if "/" in name:
+            return None
+        # One scandir per request keeps edits to the frontend live without a restart.
+        files = _served_files(self.root)
+        if files != self._signature:
+            with self._lock:
+                if files != self._signature:
+                    self._assets = self._load(files)
+                    self._signature = files
+        return self._assets.get(name)
+
+def cache_control(asset, version):
+    """Versioned URLs never change; everything else is revalidated every time."""
+    if version and version == asset.etag and asset.name != INDEX:
+        return f"public, max-age={STATIC_MAX_AGE}, immutable"
+    return "no-cache"
+
+def etag_matches(if_none_match, asset):
+    """Whether an If-None-Match header names any encoding of this asset."""
+    for tag in (if_none_match or "").split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag == "*" or tag.split("-")[0] == asset.etag:
+            return True
+    return False
+
+def precompress(root=FRONTEND_DIR):
+    """Write .gz (and .br, with brotli installed) next to each compressible asset."""
+    written = 0
+    for name, _, _ in _served_files(root):
+        if os.path.splitext(name)[1] not in COMPRESSIBLE_TYPES or name == INDEX:
+            continue
+        path = os.path.join(root, name)
+        with open(path, "rb") as handle:
+            data = handle.read()
+        for suffix, compress in _encoders().values():
+            packed = path + suffix
+            if os.path.exists(packed) and os.stat(packed).st_mtime_ns >= os.stat(path).st_mtime_ns:
+                continue
+            with open(packed, "wb") as handle:
+                handle.write(compress(data))
+            written += 1
+    return written
+
+if __name__ == "__main__":
+    count = precompress()
+    print(f"🗜️  Wrote {count} precompressed files in {FRONTEND_DIR}"
+          + ("" if brotli else " (brotli not installed, gzip only)"))